@@ -0,0 +1,363 @@
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# KORELASI STREAMING (WELFORD / CHAN)
+# =========================================================
+@dataclass
+class CovarianceAccumulator:
+    """Akumulator kovarians satu-lintasan yang bisa digabung (merge).
+
+    Menyimpan jumlah baris, rata-rata, dan co-moment (jumlah hasil kali
+    deviasi) sehingga data bisa diproses per chunk atau per partisi, lalu
+    hasil parsialnya digabung tanpa membaca ulang data mentah.
+    """
+    columns: list
+    n: int = 0
+    mean: np.ndarray = field(default=None)
+    comoment: np.ndarray = field(default=None)
+
+    def __post_init__(self):
+        k = len(self.columns)
+        if self.mean is None:
+            self.mean = np.zeros(k)
+        if self.comoment is None:
+            self.comoment = np.zeros((k, k))
+
+    def update(self, chunk):
+        # Baris dengan nilai kosong dibuang (listwise) agar semua pasangan memakai baris yang sama
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype=float)
+        x = np.asarray(chunk, dtype=float)
+        x = x[~np.isnan(x).any(axis=1)]
+        if len(x) == 0:
+            return self
+
+        mean_b = x.mean(axis=0)
+        dev = x - mean_b
+        merged = self.merge(CovarianceAccumulator(self.columns, len(x), mean_b, dev.T @ dev))
+        self.n, self.mean, self.comoment = merged.n, merged.mean, merged.comoment
+        return self
+
+    def merge(self, other):
+        # Hasil gabungan selalu objek baru; akumulator sumber (mis. dari cache) tidak diubah
+        if other.n == 0:
+            return CovarianceAccumulator(self.columns, self.n, self.mean.copy(), self.comoment.copy())
+        if self.n == 0:
+            return CovarianceAccumulator(self.columns, other.n, other.mean.copy(), other.comoment.copy())
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        return CovarianceAccumulator(self.columns, n, self.mean + delta * (other.n / n), comoment)
+
+    def covariance(self, ddof=1):
+        if self.n - ddof <= 0:
+            return pd.DataFrame(np.nan, index=self.columns, columns=self.columns)
+        return pd.DataFrame(self.comoment / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        diag = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.comoment / np.outer(diag, diag)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def to_frame(self):
+        # Bentuk tabel (untuk disimpan sebagai Parquet): matriks co-moment + kolom _mean dan _n
+        frame = pd.DataFrame(self.comoment, index=self.columns, columns=self.columns)
+        frame["_mean"] = self.mean
+        frame["_n"] = self.n
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame):
+        columns = list(frame.index)
+        n = int(frame["_n"].iloc[0]) if len(frame) else 0
+        return cls(columns, n, frame["_mean"].to_numpy(dtype=float), frame[columns].to_numpy(dtype=float))
+
+
+def merge_accumulators(parts, columns):
+    # Penggabungan berpasangan (pohon) menjaga error pembulatan tetap kecil
+    parts = [p for p in parts if p.n > 0]
+    if not parts:
+        return CovarianceAccumulator(columns)
+    while len(parts) > 1:
+        merged = [parts[i].merge(parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
+
+
+def accumulate_frame(frame, columns, chunksize=100_000):
+    acc = CovarianceAccumulator(columns)
+    for start in range(0, len(frame), chunksize):
+        acc.update(frame.iloc[start:start + chunksize])
+    return acc
+
+# =========================================================
+# PERMUKAAN RESPONS 2D (HISTOGRAM BERBOBOT PER HARI)
+# =========================================================
+@dataclass
+class SurfaceGrids:
+    """Grid jumlah (per ukuran) dan banyak baris (count) per hari dalam bentuk prefix-sum.
+
+    Permukaan untuk rentang tanggal mana pun didapat dari selisih dua prefix,
+    tanpa membaca ulang data mentah.
+    """
+    days: np.ndarray
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+    cum_sums: dict
+    cum_count: np.ndarray
+
+    def _bounds(self, start, end):
+        lo = np.searchsorted(self.days, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.days, np.datetime64(end, "D"), side="right")
+        return lo, hi
+
+    def surface(self, start, end, measure="cnt"):
+        lo, hi = self._bounds(start, end)
+        cum = self.cum_sums[measure]
+        return cum[hi] - cum[lo], self.cum_count[hi] - self.cum_count[lo]
+
+    def mean_surface(self, start, end, min_count=1, measure="cnt"):
+        sums, counts = self.surface(start, end, measure)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts >= min_count, sums / counts, np.nan)
+
+    def ratio_surface(self, start, end, numerator, denominator, min_count=1):
+        lo, hi = self._bounds(start, end)
+        num = self.cum_sums[numerator][hi] - self.cum_sums[numerator][lo]
+        den = self.cum_sums[denominator][hi] - self.cum_sums[denominator][lo]
+        counts = self.cum_count[hi] - self.cum_count[lo]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where((counts >= min_count) & (den > 0), num / den, np.nan)
+
+    def to_tables(self):
+        # Grid prefix diratakan menjadi kolom per ukuran (+ _count) agar bisa disimpan sebagai Parquet
+        grid = pd.DataFrame({name: cum.ravel() for name, cum in self.cum_sums.items()})
+        grid["_count"] = self.cum_count.ravel()
+        return {
+            "grid": grid,
+            "days": pd.DataFrame({"day": self.days}),
+            "edges": pd.DataFrame({"x": self.x_edges, "y": self.y_edges}),
+        }
+
+    @classmethod
+    def from_tables(cls, tables):
+        edges = tables["edges"]
+        bins = len(edges) - 1
+        days = tables["days"]["day"].to_numpy().astype("datetime64[D]")
+        shape = (len(days) + 1, bins, bins)
+        grid = tables["grid"]
+        return cls(
+            days=days,
+            x_edges=edges["x"].to_numpy(),
+            y_edges=edges["y"].to_numpy(),
+            cum_sums={name: grid[name].to_numpy().reshape(shape) for name in grid.columns if name != "_count"},
+            cum_count=grid["_count"].to_numpy().reshape(shape),
+        )
+
+
+def bin_index(values, edges):
+    bins = len(edges) - 1
+    idx = np.searchsorted(edges, values, side="right") - 1
+    return np.clip(idx, 0, bins - 1)
+
+
+def build_surface_grids(dates, x, y, measures, bins=20, x_range=None, y_range=None):
+    """Bangun grid harian dengan `np.bincount` berbobot: satu grid count dan satu grid sum per ukuran.
+
+    `measures` memetakan nama ukuran ke nilai per baris; indeks bin dihitung
+    sekali dan dipakai bersama oleh semua ukuran.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    weights = {name: np.asarray(v, dtype=float) for name, v in measures.items()}
+    ok = ~(np.isnan(x) | np.isnan(y))
+    for w in weights.values():
+        ok &= ~np.isnan(w)
+    x, y = x[ok], y[ok]
+
+    x_edges = np.linspace(*(x_range or (x.min(), x.max())), bins + 1)
+    y_edges = np.linspace(*(y_range or (y.min(), y.max())), bins + 1)
+    return grids_from_cells(
+        np.asarray(dates, dtype="datetime64[D]")[ok], bin_index(x, x_edges), bin_index(y, y_edges),
+        {name: w[ok] for name, w in weights.items()}, x_edges, y_edges,
+    )
+
+
+def grids_from_cells(dates, x_bin, y_bin, sums, x_edges, y_edges, counts=None):
+    """Grid prefix dari sel (hari, bin x, bin y); `counts` None = tiap baris dihitung satu.
+
+    Dipakai untuk baris mentah maupun sel yang sudah dijumlahkan (mis. hasil GROUP BY di SQL).
+    """
+    bins = len(x_edges) - 1
+    days, day_idx = np.unique(np.asarray(dates, dtype="datetime64[D]"), return_inverse=True)
+    flat = (day_idx * bins + np.asarray(x_bin, dtype=np.int64)) * bins + np.asarray(y_bin, dtype=np.int64)
+    size = len(days) * bins * bins
+    shape = (len(days), bins, bins)
+    zero = np.zeros((1, bins, bins))
+
+    def prefix(grid):
+        return np.concatenate([zero, grid.reshape(shape).cumsum(axis=0)])
+
+    if counts is None:
+        count_grid = np.bincount(flat, minlength=size)
+    else:
+        count_grid = np.rint(np.bincount(flat, weights=np.asarray(counts, dtype=float), minlength=size)).astype(np.int64)
+    return SurfaceGrids(
+        days=days,
+        x_edges=x_edges,
+        y_edges=y_edges,
+        cum_sums={name: prefix(np.bincount(flat, weights=np.asarray(w, dtype=float), minlength=size)) for name, w in sums.items()},
+        cum_count=prefix(count_grid),
+    )
+
+# =========================================================
+# BOOTSTRAP CI (MATRIKS INDEKS, TANPA LOOP PER RESAMPLE)
+# =========================================================
+def bootstrap_group_ratios(codes, n_groups, measures, n_boot=2000, seed=0, max_cells=4_000_000):
+    """Replikasi bootstrap (resample per grup) untuk statistik sum(pembilang) / sum(penyebut).
+
+    `codes` adalah kode grup 0..n_groups-1 per unit resample (baris, atau jumlah
+    per hari); `measures` memetakan nama ukuran ke (pembilang, penyebut) dengan
+    penyebut None = jumlah unit (rata-rata biasa). Satu matriks indeks (resample × baris) dipakai bersama oleh semua
+    ukuran; resample diproses per blok agar memori tetap dibatasi `max_cells`.
+    Mengembalikan (estimasi, replikasi): dict nama → array (n_groups,) dan (n_boot, n_groups).
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    present = np.flatnonzero(sizes)
+
+    # Baris diurutkan per grup; setiap kolom matriks indeks mengambil acak dari grupnya sendiri
+    sorted_codes = codes[order]
+    col_start = starts[sorted_codes]
+    col_size = sizes[sorted_codes]
+    values = {
+        name: (
+            np.asarray(num, dtype=float)[order],
+            None if den is None else np.asarray(den, dtype=float)[order],
+        )
+        for name, (num, den) in measures.items()
+    }
+
+    def group_ratio(num, den):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(den > 0, num / den, np.nan)
+
+    estimate = {}
+    for name, (num, den) in values.items():
+        num_sum = np.bincount(sorted_codes, weights=num, minlength=n_groups)
+        den_sum = sizes.astype(float) if den is None else np.bincount(sorted_codes, weights=den, minlength=n_groups)
+        estimate[name] = group_ratio(num_sum, den_sum)
+
+    replicates = {name: np.full((n_boot, n_groups), np.nan) for name in measures}
+    n_rows = len(codes)
+    if n_rows == 0:
+        return estimate, replicates
+
+    rng = np.random.default_rng(seed)
+    block = max(1, max_cells // n_rows)
+    seg_starts = starts[present]
+    for lo in range(0, n_boot, block):
+        b = min(block, n_boot - lo)
+        idx = col_start + rng.integers(0, col_size, size=(b, n_rows))
+        den_count = np.broadcast_to(sizes[present].astype(float), (b, len(present)))
+        for name, (num, den) in values.items():
+            num_sum = np.add.reduceat(num[idx], seg_starts, axis=1)
+            den_sum = den_count if den is None else np.add.reduceat(den[idx], seg_starts, axis=1)
+            replicates[name][lo:lo + b, present] = group_ratio(num_sum, den_sum)
+    return estimate, replicates
+
+
+def percentile_ci(replicates, level=0.95):
+    """Interval persentil dari replikasi bootstrap (per kolom)."""
+    tail = (1 - level) / 2 * 100
+    # Grup tanpa data (semua replikasi NaN) menghasilkan NaN tanpa peringatan
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+
+# =========================================================
+# DEKOMPOSISI MUSIMAN (FFT)
+# =========================================================
+def hourly_grid(hours, numerator, denominator=None):
+    """Deret per jam pada grid lengkap dari nomor jam (jam sejak epoch) per baris.
+
+    Nilai per jam = jumlah pembilang (atau rasio jumlah pembilang/penyebut).
+    Jam tanpa data diisi interpolasi linear. Mengembalikan (jam_awal, deret, terisi).
+    """
+    hours = np.asarray(hours, dtype=np.int64)
+    start = int(hours.min())
+    pos = hours - start
+    n = int(pos.max()) + 1
+    counts = np.bincount(pos, minlength=n)
+    series = np.bincount(pos, weights=np.asarray(numerator, dtype=float), minlength=n)
+    if denominator is not None:
+        den = np.bincount(pos, weights=np.asarray(denominator, dtype=float), minlength=n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            series = np.where(den > 0, series / den, np.nan)
+    filled = (counts == 0) | np.isnan(series)
+    if filled.any() and not filled.all():
+        known = np.flatnonzero(~filled)
+        series[filled] = np.interp(np.flatnonzero(filled), known, series[known])
+    return start, series, filled
+
+
+@dataclass
+class Decomposition:
+    """Deret teramati = tren + jumlah komponen musiman + residual."""
+    observed: np.ndarray
+    trend: np.ndarray
+    seasonal: dict
+    residual: np.ndarray
+
+    def strength(self):
+        # Porsi variansi deret tanpa tren yang dijelaskan tiap komponen (komponen FFT saling ortogonal)
+        var = np.var(self.observed - self.trend)
+        parts = dict(self.seasonal)
+        parts["Residual"] = self.residual
+        return {name: (np.var(comp) / var if var > 0 else np.nan) for name, comp in parts.items()}
+
+
+def fft_decompose(series, periods, min_cycles=2):
+    """Pisahkan tren, komponen periodik, dan residual dengan satu `np.fft.rfft`.
+
+    `periods` memetakan nama komponen ke (periode dalam sampel, jumlah harmonik).
+    Komponen hanya dipakai jika deret memuat minimal `min_cycles` siklus. Tren =
+    garis linear + semua frekuensi yang lebih lambat dari periode terpanjang yang dipakai.
+    """
+    x = np.asarray(series, dtype=float)
+    n = len(x)
+    t = np.arange(n)
+    # Tren linear dibuang dulu agar tepi deret tidak "bocor" ke semua frekuensi
+    slope, intercept = np.polyfit(t, x, 1)
+    linear = intercept + slope * t
+    spectrum = np.fft.rfft(x - linear)
+    bins = np.arange(len(spectrum))
+
+    used = np.zeros(len(spectrum), dtype=bool)
+    seasonal = {}
+    active = {name: spec for name, spec in periods.items() if n >= min_cycles * spec[0]}
+    # Periode terpendek lebih dulu: harmonik harian tidak dihitung ulang sebagai komponen mingguan
+    for name, (period, harmonics) in sorted(active.items(), key=lambda kv: kv[1][0]):
+        k = np.rint(np.arange(1, harmonics + 1) * n / period).astype(np.int64)
+        k = k[(k > 0) & (k < len(spectrum))]
+        k = k[~used[k]]
+        mask = np.zeros(len(spectrum), dtype=bool)
+        mask[k] = True
+        used |= mask
+        seasonal[name] = np.fft.irfft(np.where(mask, spectrum, 0), n)
+
+    longest = max((spec[0] for spec in active.values()), default=n)
+    trend_mask = (bins * longest < n) & ~used
+    trend = linear + np.fft.irfft(np.where(trend_mask, spectrum, 0), n)
+    residual = x - trend - sum(seasonal.values(), np.zeros(n))
+    return Decomposition(x, trend, seasonal, residual)
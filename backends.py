@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import CovarianceAccumulator, build_surface_grids, grids_from_cells
+from partitions import (
+    CORR_KEY, PARTIAL_RULES, merge_partials, partial_aggregates, tag_periods, to_day_number,
+)
+from validation import REQUIRED_COLUMNS
+
+# =========================================================
+# BACKEND QUERY: PANDAS (MEMORI) / SQLITE (BERINDEKS)
+# =========================================================
+# Semua backend punya metode yang sama dan mengembalikan bentuk hasil yang sama:
+#   aggregates   → agregat parsial (+ akumulator korelasi) per periode, seperti merge_partials
+#   day_sums     → jumlah baris & ukuran per (periode, hari, kunci), unit resample bootstrap
+#   hourly_sums  → jumlah ukuran per jam (untuk dekomposisi FFT)
+#   surface_grids→ SurfaceGrids untuk permukaan respons
+#   describe     → rentang tanggal, daftar stasiun & rentang kolom seluruh data (untuk kontrol sidebar)
+SQLITE_TABLE = "hours"
+SQLITE_INDEXES = {
+    "idx_hours_dteday_hr": ("dteday", "hr"),
+    "idx_hours_weathersit_dteday": ("weathersit", "dteday"),
+}
+
+
+class PandasBackend:
+    """Semua agregasi dihitung dari DataFrame yang sudah dimuat di memori."""
+    name = "pandas"
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def _select(self, stations):
+        return self.frame[self.frame["station"].isin(stations)]
+
+    def aggregates(self, periods, stations, specs, corr_columns=None):
+        tagged = tag_periods(self._select(stations), periods)
+        return merge_partials([partial_aggregates(tagged, specs, corr_columns)], specs, corr_columns)
+
+    def day_sums(self, periods, stations, keys, columns):
+        tagged = tag_periods(self._select(stations), periods)
+        out = tagged.groupby(["period", "dteday", *keys], sort=True).agg(
+            n=("dteday", "size"), **{f"{c}_sum": (c, "sum") for c in columns}
+        )
+        return out.reset_index()
+
+    def hourly_sums(self, start, end, stations, columns):
+        sub = self._select(stations)
+        sub = sub[(sub["dteday"] >= start) & (sub["dteday"] <= end)]
+        hours = to_day_number(sub["dteday"]) * 24 + sub["hr"].to_numpy(dtype=np.int64)
+        return sub[list(columns)].groupby(hours).sum().rename_axis("hour").reset_index()
+
+    def surface_grids(self, stations, x_col, y_col, bins, x_range, y_range, measures):
+        sub = self._select(stations)
+        return build_surface_grids(
+            sub["dteday"], sub[x_col], sub[y_col], {m: sub[m] for m in measures},
+            bins=bins, x_range=x_range, y_range=y_range,
+        )
+
+    def describe(self, columns):
+        f = self.frame
+        return {
+            "start": f["dteday"].min(),
+            "end": f["dteday"].max(),
+            "stations": sorted(f["station"].unique()),
+            "ranges": {c: (f[c].min(), f[c].max()) for c in columns},
+        }
+
+
+def _day_text(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _corr_expr(col):
+    # Porsi casual per baris (%), sama seperti add_casual_share
+    if col == "casual_share":
+        return "(CASE WHEN cnt > 0 THEN casual * 100.0 / cnt ELSE 0.0 END)"
+    return f"CAST({col} AS REAL)"
+
+
+def _bin_case(col, edges):
+    # Sama dengan bin_index: searchsorted(edges, v, "right") - 1, dipotong ke [0, bins - 1]
+    interior = list(edges[1:-1])
+    whens = " ".join(f"WHEN {col} < ? THEN {i}" for i in range(len(interior)))
+    return f"(CASE {whens} ELSE {len(interior)} END)", [float(e) for e in interior]
+
+
+class SQLiteBackend:
+    """Agregasi didorong ke SQLite (stdlib); hanya hasil GROUP BY yang masuk ke Python.
+
+    Data disimpan di satu tabel `hours` dengan indeks (dteday, hr) dan
+    (weathersit, dteday). Koneksi dibuka read-only per query, jadi aman dipakai
+    banyak thread/proses sekaligus.
+    """
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    @classmethod
+    def build(cls, path, frames):
+        """Tulis frame (boleh bertahap, mis. per partisi) ke database baru lalu buat indeks.
+
+        Database ditulis ke file sementara lalu di-rename, jadi pembaca tidak pernah
+        melihat database setengah jadi.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        columns = [c for c in REQUIRED_COLUMNS if c != "dteday"]
+        try:
+            with closing(sqlite3.connect(tmp)) as con:
+                for frame in frames:
+                    out = frame[columns].copy()
+                    out.insert(0, "dteday", frame["dteday"].dt.strftime("%Y-%m-%d"))
+                    out.insert(0, "station", frame["station"].astype(str))
+                    out["day"] = to_day_number(frame["dteday"])
+                    out.to_sql(SQLITE_TABLE, con, if_exists="append", index=False, chunksize=50_000)
+                for name, cols in SQLITE_INDEXES.items():
+                    con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {SQLITE_TABLE} ({', '.join(cols)})")
+                con.execute("ANALYZE")
+                con.commit()
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return cls(path)
+
+    def _query(self, sql, params=()):
+        with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as con:
+            return pd.read_sql_query(sql, con, params=list(params))
+
+    @staticmethod
+    def _where(stations, start=None, end=None):
+        clauses = [f"station IN ({', '.join('?' * len(stations))})"]
+        params = [str(s) for s in stations]
+        if start is not None:
+            clauses.append("dteday BETWEEN ? AND ?")
+            params += [_day_text(start), _day_text(end)]
+        return " AND ".join(clauses), params
+
+    def aggregates(self, periods, stations, specs, corr_columns=None):
+        merged = {}
+        for name, keys in specs.items():
+            cols = ", ".join(keys)
+            selects, params = [], []
+            for order, (label, start, end) in enumerate(periods):
+                where, p = self._where(stations, start, end)
+                selects.append(
+                    f"SELECT ? AS period, {order} AS _order, {cols}, COUNT(*) AS n, "
+                    "SUM(cnt) AS cnt_sum, SUM(casual) AS casual_sum, SUM(registered) AS registered_sum, "
+                    f"SUM(day) AS day_sum, MAX(day) AS day_max FROM {SQLITE_TABLE} WHERE {where} GROUP BY {cols}"
+                )
+                params += [label, *p]
+            frame = self._query(" UNION ALL ".join(selects) + f" ORDER BY _order, {cols}", params)
+            if frame.empty:
+                merged[name] = pd.DataFrame(columns=list(PARTIAL_RULES))
+            else:
+                merged[name] = frame.drop(columns="_order").set_index(["period", *keys])
+        if corr_columns:
+            merged[CORR_KEY] = {}
+            for label, start, end in periods:
+                acc = self._covariance(list(corr_columns), stations, start, end)
+                if acc.n > 0:
+                    merged[CORR_KEY][label] = acc
+        return merged
+
+    def _covariance(self, columns, stations, start, end):
+        # Dua lintasan di dalam SQL (rata-rata dulu, lalu jumlah hasil kali deviasi) agar stabil secara numerik
+        k = len(columns)
+        where, params = self._where(stations, start, end)
+        exprs = ", ".join(f"{_corr_expr(c)} AS c{i}" for i, c in enumerate(columns))
+        not_null = " AND ".join(f"c{i} IS NOT NULL" for i in range(k))
+        means = ", ".join(f"AVG(c{i}) AS m{i}" for i in range(k))
+        pairs = [(i, j) for i in range(k) for j in range(i, k)]
+        products = ", ".join(f"SUM((c{i} - m{i}) * (c{j} - m{j})) AS s{i}_{j}" for i, j in pairs)
+        sql = (
+            f"WITH f AS (SELECT * FROM (SELECT {exprs} FROM {SQLITE_TABLE} WHERE {where}) WHERE {not_null}), "
+            f"m AS (SELECT COUNT(*) AS n, {means} FROM f) "
+            f"SELECT m.*, {products} FROM f, m"
+        )
+        row = self._query(sql, params).iloc[0]
+        n = int(row["n"] or 0)
+        if n == 0:
+            return CovarianceAccumulator(columns)
+        comoment = np.zeros((k, k))
+        for i, j in pairs:
+            comoment[i, j] = comoment[j, i] = row[f"s{i}_{j}"]
+        mean = np.array([row[f"m{i}"] for i in range(k)], dtype=float)
+        return CovarianceAccumulator(columns, n, mean, comoment)
+
+    def day_sums(self, periods, stations, keys, columns):
+        group = ", ".join(["dteday", *keys])
+        sums = ", ".join(f"SUM({c}) AS {c}_sum" for c in columns)
+        selects, params = [], []
+        for label, start, end in periods:
+            where, p = self._where(stations, start, end)
+            selects.append(f"SELECT ? AS period, {group}, COUNT(*) AS n, {sums} FROM {SQLITE_TABLE} WHERE {where} GROUP BY {group}")
+            params += [label, *p]
+        frame = self._query(" UNION ALL ".join(selects) + f" ORDER BY period, {group}", params)
+        frame["dteday"] = pd.to_datetime(frame["dteday"])
+        return frame
+
+    def hourly_sums(self, start, end, stations, columns):
+        where, params = self._where(stations, start, end)
+        sums = ", ".join(f"SUM({c}) AS {c}" for c in columns)
+        sql = f"SELECT day * 24 + hr AS hour, {sums} FROM {SQLITE_TABLE} WHERE {where} GROUP BY day, hr ORDER BY hour"
+        return self._query(sql, params)
+
+    def surface_grids(self, stations, x_col, y_col, bins, x_range, y_range, measures):
+        where, params = self._where(stations)
+        if x_range is None or y_range is None:
+            bounds = self._query(
+                f"SELECT MIN({x_col}) AS x0, MAX({x_col}) AS x1, MIN({y_col}) AS y0, MAX({y_col}) AS y1 "
+                f"FROM {SQLITE_TABLE} WHERE {where}", params,
+            ).iloc[0]
+            x_range = x_range or (bounds["x0"], bounds["x1"])
+            y_range = y_range or (bounds["y0"], bounds["y1"])
+        x_edges = np.linspace(*x_range, bins + 1)
+        y_edges = np.linspace(*y_range, bins + 1)
+        x_case, x_params = _bin_case(x_col, x_edges)
+        y_case, y_params = _bin_case(y_col, y_edges)
+        sums = ", ".join(f"SUM({m}) AS {m}" for m in measures)
+        not_null = " AND ".join(f"{c} IS NOT NULL" for c in [x_col, y_col, *measures])
+        cells = self._query(
+            f"SELECT dteday, {x_case} AS xb, {y_case} AS yb, COUNT(*) AS n, {sums} "
+            f"FROM {SQLITE_TABLE} WHERE {where} AND {not_null} GROUP BY dteday, xb, yb",
+            x_params + y_params + params,
+        )
+        return grids_from_cells(
+            pd.to_datetime(cells["dteday"]), cells["xb"], cells["yb"],
+            {m: cells[m] for m in measures}, x_edges, y_edges, counts=cells["n"],
+        )
+
+    def describe(self, columns):
+        # MIN/MAX(dteday) memakai indeks; hanya satu baris ringkasan + daftar stasiun yang dibaca
+        bounds = ", ".join(f"MIN({c}) AS {c}_min, MAX({c}) AS {c}_max" for c in columns)
+        row = self._query(f"SELECT MIN(dteday) AS first_day, MAX(dteday) AS last_day, {bounds} FROM {SQLITE_TABLE}").iloc[0]
+        stations = self._query(f"SELECT DISTINCT station FROM {SQLITE_TABLE} ORDER BY station")["station"]
+        return {
+            "start": pd.Timestamp(row["first_day"]),
+            "end": pd.Timestamp(row["last_day"]),
+            "stations": list(stations),
+            "ranges": {c: (row[f"{c}_min"], row[f"{c}_max"]) for c in columns},
+        }
@@ -0,0 +1,132 @@
+"""Bandingkan backend pandas (memori) dan SQLite (berindeks) untuk setiap analisis dashboard.
+
+Contoh:
+    python benchmark_backends.py                  # hour_cleaned.csv / data/<stasiun>/*.csv
+    python benchmark_backends.py --stations 20    # data digandakan menjadi 20 stasiun
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backends import PandasBackend, SQLiteBackend
+from partitions import AGG_SPECS, CORR_COLUMNS, CORR_KEY, MEASURE_COLUMNS, discover_partitions, load_partitions
+from validation import validate_frame
+
+BASE = Path(__file__).parent
+
+
+def load_data(root, stations):
+    parts = discover_partitions(root / "data")
+    if parts:
+        frame = load_partitions(parts)
+    else:
+        frame = pd.read_csv(root / "hour_cleaned.csv").assign(station="hour_cleaned")
+    frame["dteday"] = pd.to_datetime(frame["dteday"], errors="coerce")
+    frame, _, _ = validate_frame(frame)
+    if stations > 1:
+        # Salin data menjadi beberapa stasiun sintetis untuk menguji riwayat yang lebih besar
+        frame = pd.concat(
+            [frame.assign(station=frame["station"].astype(str) + f"_{i}") for i in range(stations)],
+            ignore_index=True,
+        )
+    return frame
+
+
+def analyses(frame):
+    """Fungsi per analisis: backend → hasil yang bisa dibandingkan (dict nama → DataFrame/array)."""
+    stations = sorted(frame["station"].unique())
+    start, end = frame["dteday"].min(), frame["dteday"].max()
+    periods = [("Periode A", start, end)]
+    x_range = (frame["temp"].min(), frame["temp"].max())
+    y_range = (frame["hum"].min(), frame["hum"].max())
+
+    def aggregate(name, keys):
+        def run(backend):
+            part = backend.aggregates(periods, stations, {name: keys})[name]
+            return {name: part.sort_index()}
+        return run
+
+    def correlation(backend):
+        accs = backend.aggregates(periods, stations, {}, CORR_COLUMNS)[CORR_KEY]
+        return {label: acc.correlation() for label, acc in accs.items()}
+
+    def surface(backend):
+        grids = backend.surface_grids(stations, "temp", "hum", 20, x_range, y_range, MEASURE_COLUMNS)
+        sums, counts = grids.surface(start, end)
+        return {"sum": sums, "count": counts}
+
+    def bootstrap_days(backend):
+        days = backend.day_sums(periods, stations, ["weathersit"], MEASURE_COLUMNS)
+        return {"days": days.drop(columns=["period", "dteday"])}
+
+    def decomposition(backend):
+        sums = backend.hourly_sums(start, end, stations, MEASURE_COLUMNS)
+        return {"hourly": sums.set_index("hour")}
+
+    out = {f"Agregat: {name}": aggregate(name, keys) for name, keys in AGG_SPECS.items()}
+    out["Korelasi"] = correlation
+    out["Permukaan Respons"] = surface
+    out["Bootstrap CI (jumlah per hari)"] = bootstrap_days
+    out["Dekomposisi FFT (jumlah per jam)"] = decomposition
+    return out
+
+
+def same(a, b):
+    for key in a:
+        x, y = a[key], b.get(key)
+        if y is None:
+            return False
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape or not np.allclose(x, y, rtol=1e-9, atol=1e-9, equal_nan=True):
+            return False
+    return len(a) == len(b)
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", type=Path, default=BASE)
+    parser.add_argument("--stations", type=int, default=1, help="gandakan data menjadi N stasiun")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frame = load_data(args.root, args.stations)
+    print(f"Data: {len(frame):,} baris, {frame['station'].nunique()} stasiun")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        sqlite = SQLiteBackend.build(Path(tmp) / "bench.sqlite", [frame])
+        print(f"Membangun database SQLite + indeks: {time.perf_counter() - t0:.2f} s\n")
+        backends = [PandasBackend(frame), sqlite]
+
+        rows = []
+        for label, fn in analyses(frame).items():
+            (t_pd, r_pd), (t_sql, r_sql) = [timed(lambda b=b: fn(b), args.repeat) for b in backends]
+            rows.append({
+                "Analisis": label,
+                "pandas (ms)": t_pd * 1000,
+                "sqlite (ms)": t_sql * 1000,
+                "sqlite / pandas": t_sql / t_pd,
+                "Hasil sama": "ya" if same(r_pd, r_sql) else "TIDAK",
+            })
+
+    table = pd.DataFrame(rows)
+    with pd.option_context("display.float_format", "{:,.2f}".format, "display.width", 120):
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
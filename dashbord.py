@@ -1,3 +1,7 @@
+import hashlib
+import importlib.machinery
+import io
+import os
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -5,6 +9,16 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from analytics import SurfaceGrids, bootstrap_group_ratios, fft_decompose, hourly_grid, percentile_ci
+from backends import PandasBackend, SQLiteBackend
+from disk_cache import DiskCache, file_fingerprint, frame_digest
+from export import EXPORT_FORMATS, export_name, export_tables
+from validation import QualityReport
+from partitions import (
+    AGG_SPECS, CORR_COLUMNS, CORR_KEY, MEASURE_COLUMNS, aggregate_partitions, aggregates_from_tables, aggregates_to_tables, discover_partitions, finalize, latest_days,
+    iter_chunks, make_executor, read_partition, rollup, scan_partition, select_partitions, tag_periods, validate_partitions,
+)
+
 # =========================================================
 # CONFIG
 # =========================================================
@@ -149,49 +163,420 @@ def highlight_best_worst(df, value_col):
         return out
     return df.style.apply(_style, subset=[value_col])
 
+# Tabel agregat yang bisa diunduh untuk analisis yang sedang tampil (diisi ulang setiap rerun)
+EXPORTS = {}
+
+def export_table(name, frame):
+    EXPORTS[name] = frame
+
 # =========================================================
 # LOAD DATA
 # =========================================================
 BASE = Path(__file__).parent
 CSV_PATH = BASE / "hour_cleaned.csv"
+# Banyak stasiun/kota: data/<stasiun>/*.csv (satu file = satu partisi)
+DATA_DIR = BASE / "data"
 
 @st.cache_data
-def load_csv(p: Path) -> pd.DataFrame:
-    return pd.read_csv(p)
+def find_partitions(root: Path, fallback: Path) -> list:
+    parts = discover_partitions(root)
+    if not parts and fallback.exists():
+        parts = [scan_partition(fallback.stem, fallback)]
+    return parts
+
+# Streamlit menjalankan skrip ini sebagai modul __main__; tanpa __spec__ worker forkserver akan
+# menjalankan ulang seluruh dashboard saat start. Worker cukup mengimpor partitions.
+__spec__ = importlib.machinery.ModuleSpec("__main__", None)
+
+@st.cache_resource
+def get_executor():
+    return make_executor()
+
+# Cache disk bersama (Parquet) untuk data yang sudah divalidasi dan hasil agregat:
+# tahan restart/redeploy dan dipakai bersama oleh semua worker pada mesin yang sama
+CACHE_DIR = Path(os.environ.get("DASHBOARD_CACHE_DIR", BASE / ".cache"))
+CACHE = DiskCache(CACHE_DIR / "results", max_bytes=int(os.environ.get("DASHBOARD_CACHE_MB", 512)) * 2**20)
+# Data tervalidasi disimpan terpisah dari batas LRU hasil analisis: satu entri bisa sebesar seluruh riwayat
+DATASET_CACHE_MB = os.environ.get("DASHBOARD_DATASET_CACHE_MB")
+DATASETS = DiskCache(
+    CACHE_DIR / "datasets",
+    max_bytes=int(DATASET_CACHE_MB) * 2**20 if DATASET_CACHE_MB else None,
+)
 
-df = None
-if CSV_PATH.exists():
-    df = load_csv(CSV_PATH)
+# Mesin query: pandas (semua data di memori) atau SQLite berindeks (agregasi didorong ke SQL)
+QUERY_BACKENDS = {"pandas (memori)": "pandas", "SQLite (berindeks)": "sqlite"}
+SQLITE_DIR = Path(os.environ.get("DASHBOARD_SQLITE_DIR", BASE / ".sqlite"))
+
+def dataset_key(source):
+    return DiskCache.make_key("dataset", source)
+
+def part_tables(source):
+    # Nama tabel per partisi = urutannya di sidik jari; path CSV absolut bisa melebihi batas panjang nama file
+    return {entry[0]: f"part/{i}" for i, entry in enumerate(source)}
+
+def dataset_files(source, names=None):
+    # File Parquet per partisi (urut sesuai sidik jari, atau sesuai `names`), None jika tidak ada di cache disk
+    files = DATASETS.table_paths(dataset_key(source))
+    tables = part_tables(source)
+    paths = [files.get(tables[name]) for name in (names or tables)]
+    return paths if all(paths) else None
+
+@st.cache_data(show_spinner="Memuat & memeriksa kualitas data...")
+def load_dataset(source: list, _read):
+    # Kunci = sidik jari data; proses baru langsung membaca Parquet tanpa parsing CSV & validasi ulang.
+    # Data bersih disimpan per partisi (tabel part/<urutan>), urut sesuai sidik jari. Yang dikembalikan
+    # hanya karantina & laporan; data lengkap baru dimuat jika mesin query pandas yang dipakai
+    key = dataset_key(source)
+    hit = DATASETS.get(key, names=["quarantine", "report"])
+    if hit is not None:
+        return hit["quarantine"], QualityReport.from_record(hit["report"])
+
+    # Baris yang gagal validasi dikarantina dan tidak ikut dianalisis
+    parts, quarantine, report = validate_partitions(_read())
+    if not report.missing_columns:
+        tables = {table: parts[name] for name, table in part_tables(source).items()}
+        DATASETS.put(key, {**tables, "quarantine": quarantine, "report": report.to_record()})
+    return quarantine, report
+
+@st.cache_data(show_spinner="Memuat data ke memori...")
+def load_frame(source: list, _read):
+    # Hanya untuk mesin pandas, atau cadangan bila dataset tidak tersimpan di cache disk
+    paths = dataset_files(source)
+    if paths is not None:
+        return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+    parts, _, _ = validate_partitions(_read())
+    return pd.concat([parts[entry[0]] for entry in source], ignore_index=True)
+
+@st.cache_resource(show_spinner="Membangun database SQLite...")
+def get_sqlite_backend(source: list, _read):
+    # Satu database per sidik jari data; proses lain/baru langsung memakai file yang sudah ada
+    path = SQLITE_DIR / f"{DiskCache.make_key('sqlite', source)}.sqlite"
+    if path.exists():
+        return SQLiteBackend(path)
+    # Ditulis per potongan dari file Parquet per partisi, jadi data tidak perlu disalin utuh ke SQLite sekaligus
+    paths = dataset_files(source)
+    return SQLiteBackend.build(path, iter_chunks(paths) if paths is not None else [load_frame(source, _read)])
+
+partitions = find_partitions(DATA_DIR, CSV_PATH)
+
+read_source = None
+if partitions:
+    source = file_fingerprint([p.path for p in partitions])
+    read_source = lambda: {p.path: read_partition(p) for p in partitions}
 else:
     st.sidebar.warning("Letakkan `hour_cleaned.csv` di folder ini, atau unggah file di bawah.")
     up = st.sidebar.file_uploader("Unggah hour_cleaned.csv", type=["csv"])
     if up:
-        df = pd.read_csv(up)
+        source = [("upload", hashlib.sha256(up.getvalue()).hexdigest())]
+        read_source = lambda: {"upload": pd.read_csv(up).assign(station=Path(up.name).stem)}
 
-if df is None:
+if read_source is None:
     st.error("Data belum tersedia.")
     st.stop()
 
-if "dteday" not in df.columns:
-    st.error("Kolom 'dteday' tidak ada di dataset.")
+quarantine, quality = load_dataset(source, read_source)
+if quality.missing_columns:
+    st.error("Kolom berikut tidak ada di dataset: " + ", ".join(quality.missing_columns))
+    st.stop()
+if quality.quarantined == quality.rows:
+    st.error("Semua baris gagal validasi kualitas data.")
     st.stop()
-
-df["dteday"] = pd.to_datetime(df["dteday"])
 
 # Label
 weather_label = {1: "Clear", 2: "Mist/Cloudy", 3: "Light Rain/Snow", 4: "Heavy Rain/Snow"}
 weekday_labels = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
 month_labels   = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 season_labels  = {1: "Spring", 2: "Summer", 3: "Fall", 4: "Winter"}
+# Jenis hari dari pasangan (holiday, workingday)
+day_type_labels = {(0, 1): "Hari Kerja", (0, 0): "Akhir Pekan", (1, 0): "Hari Libur"}
+
+# Ukuran yang bisa dipilih: (kolom hasil agregasi, label tabel/sumbu)
+MEASURES = {
+    "Total (cnt)": ("cnt", "Rata-rata Penyewaan"),
+    "Casual": ("casual", "Rata-rata Penyewaan Casual"),
+    "Registered": ("registered", "Rata-rata Penyewaan Registered"),
+    "Porsi Casual (%)": ("casual_share", "Porsi Casual (%)"),
+}
+
+def fmt_measure(x):
+    return f"{pretty_float(x, 1)}%" if M == "casual_share" else pretty_int(x)
+
+PERIOD_A, PERIOD_B = "Periode A", "Periode B"
+DELTA_COL = "Selisih (B − A)"
+
+@st.cache_data(show_spinner="Menghitung agregat per partisi...")
+def compute_aggregates(parts: list, periods: list, source: list, stations: tuple, _backend) -> dict:
+    # Semua periode dikelompokkan sekaligus (satu lintasan di pandas, satu UNION ALL di SQLite)
+    # casual_share diturunkan dari casual/cnt di dalam backend
+    corr_cols = CORR_COLUMNS
+    key = DiskCache.make_key("aggregates", source, stations, periods, AGG_SPECS, corr_cols)
+    hit = CACHE.get(key)
+    if hit is not None:
+        return aggregates_from_tables(hit)
+    # Semua ukuran (cnt, casual, registered) ikut dihitung di sini, jadi ganti ukuran tidak menyentuh data mentah.
+    # Backend pandas dengan lebih dari satu partisi → agregat parsial dihitung paralel di process pool lalu digabung.
+    # Worker membaca file Parquet per partisi yang sudah divalidasi, jadi hasilnya sama dengan data di memori
+    paths = dataset_files(source, [str(p.path) for p in parts]) if _backend.name == "pandas" and len(parts) > 1 else None
+    if paths is not None:
+        merged = aggregate_partitions(paths, periods, AGG_SPECS, corr_cols, executor=get_executor())
+    else:
+        merged = _backend.aggregates(periods, list(stations), AGG_SPECS, corr_cols)
+    CACHE.put(key, aggregates_to_tables(merged))
+    return merged
+
+def period_view(name, keys=None):
+    part = aggs[name] if keys is None else rollup(aggs[name], ["period"] + keys)
+    return finalize(part, latest)
+
+def rfm_view(view):
+    # Monetary = total ukuran terpilih per bulan (porsi casual: persentase dari total)
+    monetary = view["casual_share"] if M == "casual_share" else view[f"{M}_sum"]
+    return view.assign(frequency=view["n"], monetary=monetary)
+
+def monetary_label():
+    # Label tabel/sumbu monetary: total ukuran per bulan, atau persentase untuk porsi casual
+    return M_LABEL if M == "casual_share" else M_LABEL.replace("Rata-rata", "Total")
+
+def single(view):
+    return view[view["period"] == PERIOD_A].drop(columns="period").reset_index(drop=True)
+
+def compare_wide(view, label_col, value_col="cnt", order=None):
+    wide = view.pivot_table(index=label_col, columns="period", values=value_col, aggfunc="first")
+    wide = wide.reindex(columns=[PERIOD_A, PERIOD_B])
+    if order is not None:
+        wide = wide.reindex(order)
+    wide.columns.name = None
+    wide[DELTA_COL] = wide[PERIOD_B] - wide[PERIOD_A]
+    return wide.reset_index()
+
+def show_period_comparison(wide, label_col, title, ylabel, kind="line", nd=None):
+    # nd=None → format mengikuti ukuran terpilih
+    if nd is None:
+        fmt = fmt_measure
+    else:
+        fmt = pretty_int if nd == 0 else (lambda x: pretty_float(x, nd))
+
+    st.write("Perbandingan dua periode (tabel):")
+    st.dataframe(highlight_best_worst(wide, DELTA_COL), use_container_width=True)
+    export_table(title, wide)
+
+    fig, ax = plt.subplots(figsize=(9, 5))
+    x = np.arange(len(wide))
+    labels = wide[label_col].astype(str)
+    if kind == "bar":
+        ax.bar(x - 0.2, wide[PERIOD_A], 0.4, label=period_text[PERIOD_A], color="#1E90FF")
+        ax.bar(x + 0.2, wide[PERIOD_B], 0.4, label=period_text[PERIOD_B], color="#FF8C00")
+    else:
+        ax.plot(x, wide[PERIOD_A], marker="o", linewidth=2, label=period_text[PERIOD_A], color="#1E90FF")
+        ax.plot(x, wide[PERIOD_B], marker="o", linewidth=2, label=period_text[PERIOD_B], color="#FF8C00")
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels)
+    ax.set_title(title, fontsize=13, weight="bold")
+    ax.set_ylabel(ylabel)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    ax.legend()
+    draw(fig)
+
+    d = wide.dropna(subset=[DELTA_COL])
+    if d.empty:
+        st.info("Salah satu periode tidak memiliki data untuk dibandingkan.")
+        return
+    up = d.loc[d[DELTA_COL].idxmax()]
+    down = d.loc[d[DELTA_COL].idxmin()]
+    show_insight_cards(
+        peak_label=str(up[label_col]),
+        peak_value=f"selisih terbesar ≈ {fmt(up[DELTA_COL])}",
+        low_label=str(down[label_col]),
+        low_value=f"selisih terkecil ≈ {fmt(down[DELTA_COL])}",
+        gap_label=f"≈ {fmt(d[DELTA_COL].mean())}",
+        gap_value="rata-rata selisih (B − A)",
+        conclusion_html=(
+            f"Dibanding Periode A, perubahan paling besar pada Periode B terjadi di <b>{up[label_col]}</b>, "
+            f"sedangkan perubahan paling kecil (atau penurunan terbesar) di <b>{down[label_col]}</b>."
+        )
+    )
+
+# Interval kepercayaan bootstrap untuk rata-rata per grup
+BOOT_RESAMPLES = 2000
+CI_LEVEL = 0.95
+CI_TEXT = f"CI {CI_LEVEL:.0%}"
+CI_LO, CI_HI = f"{CI_TEXT} Bawah", f"{CI_TEXT} Atas"
+
+def measure_ratios(frame):
+    # Setiap ukuran sebagai (pembilang, penyebut); penyebut None = per baris.
+    # Porsi casual = rasio total (sama seperti finalize), bukan rata-rata porsi per baris
+    out = {m: (frame[m], None) for m in MEASURE_COLUMNS}
+    out["casual_share"] = (frame["casual"] * 100, frame["cnt"])
+    return out
+
+def day_ratios(days):
+    # Sama seperti measure_ratios, tetapi dari jumlah per hari: rata-rata per jam = sum(jumlah) / sum(n)
+    out = {m: (days[f"{m}_sum"], days["n"]) for m in MEASURE_COLUMNS}
+    out["casual_share"] = (days["casual_sum"] * 100, days["cnt_sum"])
+    return out
+
+@st.cache_data(show_spinner="Menghitung interval kepercayaan (bootstrap)...")
+def compute_bootstrap(keys: tuple, periods: list, source: list, stations: tuple, _backend) -> tuple:
+    # Unit resample = hari (jam-jam dalam sehari saling berkorelasi), jadi backend cukup mengirim jumlah
+    # per (periode, hari, kunci). Semua ukuran diresample dengan matriks indeks yang sama,
+    # jadi ganti ukuran tidak menghitung ulang. Di-cache per rentang tanggal & stasiun.
+    key = DiskCache.make_key("bootstrap-days", source, stations, periods, keys, BOOT_RESAMPLES)
+    hit = CACHE.get(key)
+    if hit is not None:
+        groups = hit.pop("groups")
+        return groups, {name.split("/", 1)[1]: frame.to_numpy() for name, frame in hit.items()}
+
+    days = _backend.day_sums(periods, list(stations), list(keys), MEASURE_COLUMNS)
+    g = days.groupby(["period", *keys], sort=True)
+    groups = g.agg(n=("n", "sum"), days=("dteday", "size")).reset_index()
+    estimate, replicates = bootstrap_group_ratios(
+        g.ngroup().to_numpy(), len(groups), day_ratios(days), n_boot=BOOT_RESAMPLES,
+    )
+    for m, rep in replicates.items():
+        lo, hi = percentile_ci(rep, CI_LEVEL)
+        groups[m], groups[f"{m}_lo"], groups[f"{m}_hi"] = estimate[m], lo, hi
+    tables = {f"rep/{m}": pd.DataFrame(rep, columns=[str(i) for i in range(rep.shape[1])]) for m, rep in replicates.items()}
+    CACHE.put(key, {"groups": groups, **tables})
+    return groups, replicates
+
+def ci_view(keys):
+    """CI ukuran terpilih untuk grup Periode A; `boot_col` = posisi grup di matriks replikasi."""
+    groups, reps = compute_bootstrap(tuple(keys), periods, source, tuple(stations), backend)
+    out = groups.assign(boot_col=np.arange(len(groups)))
+    out = out[out["period"] == PERIOD_A].rename(columns={f"{M}_lo": CI_LO, f"{M}_hi": CI_HI})
+    return out[[*keys, "boot_col", CI_LO, CI_HI]], reps[M]
+
+def gap_ci(reps, hi_row, lo_row):
+    # Replikasi tiap grup independen, jadi distribusi selisih = selisih replikasi
+    lo, hi = percentile_ci(reps[:, int(hi_row["boot_col"])] - reps[:, int(lo_row["boot_col"])], CI_LEVEL)
+    return lo, hi
+
+def gap_verdict(lo, hi):
+    ci = f"{CI_TEXT} bootstrap [{fmt_measure(lo)}, {fmt_measure(hi)}]"
+    if lo > 0 or hi < 0:
+        return f"Selisih ini <b>nyata</b>: {ci} tidak mencakup 0."
+    return f"Selisih ini <b>belum tentu nyata</b>: {ci} masih mencakup 0."
+
+def ci_caption():
+    st.caption(
+        f"{CI_TEXT} dari {BOOT_RESAMPLES:,} resample bootstrap per hari: "
+        "semua jam dalam satu hari diambil bersama, karena jam-jam dalam sehari saling berkorelasi."
+    )
+
+def ci_errors(frame, value_col):
+    return [frame[value_col] - frame[CI_LO], frame[CI_HI] - frame[value_col]]
+
+def day_type_names(frame):
+    return [day_type_labels.get((int(h), int(w)), "Lainnya") for h, w in zip(frame["holiday"], frame["workingday"])]
+
+# Komponen periodik untuk dekomposisi FFT: (periode dalam jam, jumlah harmonik)
+DECOMP_PERIODS = {
+    "Harian": (24, 12),
+    "Mingguan": (168, 84),
+    "Tahunan": (8766, 4),
+}
+DECOMP_MIN_HOURS = 2 * 24
+
+@st.cache_data(show_spinner="Menghitung dekomposisi FFT...")
+def compute_decomposition(label: str, measure_col: str, periods: list, source: list, stations: tuple, _backend) -> tuple:
+    # Semua stasiun terpilih dijumlahkan per jam oleh backend; jam yang hilang diisi interpolasi
+    _, start_d, end_d = next(p for p in periods if p[0] == label)
+    sums = _backend.hourly_sums(start_d, end_d, list(stations), MEASURE_COLUMNS)
+    if sums.empty:
+        return None
+    num, den = measure_ratios(sums)[measure_col]
+    start, series, filled = hourly_grid(sums["hour"].to_numpy(), num, den)
+    if len(series) < DECOMP_MIN_HOURS:
+        return None
+    return start, filled, fft_decompose(series, DECOMP_PERIODS)
+
+def decomposition_frame(start, dec):
+    times = (start + np.arange(len(dec.observed))).astype("datetime64[h]")
+    out = pd.DataFrame({"Waktu": times, "Observasi": dec.observed, "Tren": dec.trend})
+    for name, comp in dec.seasonal.items():
+        out[f"Musiman {name}"] = comp
+    out["Residual"] = dec.residual
+    return out
+
+def strength_table(dec):
+    strength = dec.strength()
+    return pd.DataFrame({
+        "Komponen": list(strength),
+        "Periode (jam)": [DECOMP_PERIODS[n][0] if n in DECOMP_PERIODS else None for n in strength],
+        "Porsi Variansi (%)": [v * 100 for v in strength.values()],
+    })
+
+def weekly_profile(start, dec):
+    # Rata-rata komponen harian + mingguan per (hari, jam); 1970-01-01 adalah Kamis (weekday 4)
+    hours = start + np.arange(len(dec.observed))
+    slot = ((hours // 24 + 4) % 7) * 24 + hours % 24
+    short = dec.seasonal.get("Harian", 0) + dec.seasonal.get("Mingguan", 0)
+    short = np.broadcast_to(short, hours.shape)
+    counts = np.bincount(slot, minlength=168)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.bincount(slot, weights=short, minlength=168) / counts
+
+# Pasangan variabel cuaca kontinu untuk permukaan respons
+SURFACE_PAIRS = {
+    "Suhu × Kelembapan (temp × hum)": ("temp", "hum"),
+    "Suhu Terasa × Kelembapan (atemp × hum)": ("atemp", "hum"),
+    "Suhu × Kecepatan Angin (temp × windspeed)": ("temp", "windspeed"),
+    "Kelembapan × Kecepatan Angin (hum × windspeed)": ("hum", "windspeed"),
+}
+
+@st.cache_data(show_spinner="Menyiapkan grid harian...")
+def surface_grids(source: list, stations: tuple, x_col: str, y_col: str, bins: int, _backend):
+    # Grid per hari dihitung sekali; rentang tanggal apa pun cukup menjumlahkan grid harian
+    key = DiskCache.make_key("surface", source, stations, x_col, y_col, bins, MEASURE_COLUMNS)
+    hit = CACHE.get(key)
+    if hit is not None:
+        return SurfaceGrids.from_tables(hit)
+    grids = _backend.surface_grids(
+        list(stations), x_col, y_col, bins,
+        x_range=data_info["ranges"][x_col],
+        y_range=data_info["ranges"][y_col],
+        measures=MEASURE_COLUMNS,
+    )
+    CACHE.put(key, grids.to_tables())
+    return grids
+
+def surface_controls():
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        pair = st.selectbox("Pasangan variabel", list(SURFACE_PAIRS))
+    with c2:
+        bins = st.slider("Jumlah bin per sumbu", 8, 30, 20)
+    with c3:
+        min_count = st.slider("Minimal jam per sel", 1, 20, 3)
+    x_col, y_col = SURFACE_PAIRS[pair]
+    return x_col, y_col, surface_grids(source, tuple(stations), x_col, y_col, bins, backend), min_count
+
+def measure_surface(grids, start, end, min_count):
+    if M == "casual_share":
+        return grids.ratio_surface(start, end, "casual", "cnt", min_count) * 100
+    return grids.mean_surface(start, end, min_count, M)
+
+def draw_surface(mean, grids, x_col, y_col, title, cmap="YlOrRd", center=None):
+    x_mid = (grids.x_edges[:-1] + grids.x_edges[1:]) / 2
+    y_mid = (grids.y_edges[:-1] + grids.y_edges[1:]) / 2
+    plot = pd.DataFrame(mean.T, index=np.round(y_mid, 2), columns=np.round(x_mid, 2)).iloc[::-1]
+    fig, ax = plt.subplots(figsize=(11, 6))
+    sns.heatmap(plot, cmap=cmap, center=center, linewidths=0.2, ax=ax,
+                cbar_kws={"label": M_LABEL})
+    ax.set_title(title, fontsize=13, weight="bold")
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    ax.tick_params(axis="y", labelrotation=0)
+    draw(fig)
 
-if "weathersit" in df.columns:
-    df["weather_name"] = df["weathersit"].map(weather_label)
-if "weekday" in df.columns:
-    df["weekday_name"] = df["weekday"].apply(lambda x: weekday_labels[int(x) % 7])
-if "mnth" in df.columns:
-    df["month_name"] = df["mnth"].apply(lambda x: month_labels[int(x) - 1])
-if "season" in df.columns:
-    df["season_name"] = df["season"].map(season_labels)
+def surface_cells(mean, counts, grids, x_col, y_col):
+    xi, yi = np.nonzero(~np.isnan(mean))
+    return pd.DataFrame({
+        x_col: [f"{grids.x_edges[i]:.2f}–{grids.x_edges[i + 1]:.2f}" for i in xi],
+        y_col: [f"{grids.y_edges[j]:.2f}–{grids.y_edges[j + 1]:.2f}" for j in yi],
+        "Jumlah Jam": counts[xi, yi].astype(int),
+        M_LABEL: mean[xi, yi],
+    })
 
 # =========================================================
 # SIDEBAR
@@ -213,16 +598,77 @@ else:
 
 st.sidebar.markdown("## Bike Sharing Dashboard")
 
-min_d, max_d = df["dteday"].min(), df["dteday"].max()
-
-date_rng = st.sidebar.date_input(
-    "Pilih Rentang Tanggal",
-    value=(min_d.date(), max_d.date()),
-    min_value=min_d.date(),
-    max_value=max_d.date()
+with st.sidebar.expander("🧪 Kualitas Data", expanded=not quality.ok):
+    st.caption(f"{quality.rows:,} baris diperiksa • {quality.quarantined:,} dikarantina")
+    report_df = quality.to_frame()
+    report_df = report_df[report_df["Jumlah"] > 0]
+    if report_df.empty:
+        st.write("✅ Semua pemeriksaan lolos.")
+    else:
+        st.dataframe(report_df, hide_index=True, use_container_width=True)
+    if not quarantine.empty:
+        st.caption("Contoh baris yang dikarantina:")
+        st.dataframe(quarantine.head(50), use_container_width=True)
+
+default_backend = os.environ.get("DASHBOARD_BACKEND", "pandas")
+backend_label = st.sidebar.selectbox(
+    "Mesin Query",
+    list(QUERY_BACKENDS),
+    index=next((i for i, v in enumerate(QUERY_BACKENDS.values()) if v == default_backend), 0),
 )
+# Dengan SQLite data lengkap tidak pernah dimuat ke memori: batas tanggal, stasiun & rentang
+# sumbu permukaan respons diambil lewat SQL
+if QUERY_BACKENDS[backend_label] == "sqlite":
+    backend = get_sqlite_backend(source, read_source)
+else:
+    backend = PandasBackend(load_frame(source, read_source))
+
+@st.cache_data
+def describe_data(source: list, engine: str, _backend) -> dict:
+    return _backend.describe(sorted({c for pair in SURFACE_PAIRS.values() for c in pair}))
+
+data_info = describe_data(source, backend.name, backend)
+min_d, max_d = data_info["start"], data_info["end"]
+
+compare = st.sidebar.checkbox("Mode Perbandingan (2 periode)")
+
+if compare:
+    mid_d = min_d + (max_d - min_d) / 2
+    date_rng = st.sidebar.date_input(
+        "Periode A",
+        value=(min_d.date(), mid_d.date()),
+        min_value=min_d.date(),
+        max_value=max_d.date()
+    )
+    date_rng_b = st.sidebar.date_input(
+        "Periode B",
+        value=((mid_d + pd.Timedelta(days=1)).date(), max_d.date()),
+        min_value=min_d.date(),
+        max_value=max_d.date()
+    )
+else:
+    date_rng = st.sidebar.date_input(
+        "Pilih Rentang Tanggal",
+        value=(min_d.date(), max_d.date()),
+        min_value=min_d.date(),
+        max_value=max_d.date()
+    )
 start_d, end_d = safe_date_range(date_rng)
 
+periods = [(PERIOD_A, start_d, end_d)]
+if compare:
+    start_b, end_b = safe_date_range(date_rng_b)
+    periods.append((PERIOD_B, start_b, end_b))
+period_text = {label: f"{s.date()} – {e.date()}" for label, s, e in periods}
+
+all_stations = data_info["stations"]
+stations = all_stations
+if len(all_stations) > 1:
+    stations = st.sidebar.multiselect("Pilih Stasiun", all_stations, default=all_stations)
+    if not stations:
+        st.sidebar.warning("Pilih minimal satu stasiun.")
+        st.stop()
+
 analysis = st.sidebar.selectbox(
     "Pilih Analisis",
     [
@@ -230,59 +676,255 @@ analysis = st.sidebar.selectbox(
         "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)",
         "Pola Bulanan 2011 ➜ Bar Chart",
         "Tren Musim 2011–2012 ➜ Area Line",
-        "RFM ➜ (Recency Bar H, Scatter F–M, Histogram M)"
+        "RFM ➜ (Recency Bar H, Scatter F–M, Histogram M)",
+        "Korelasi ➜ Heatmap Variabel Numerik",
+        "Cuaca Kontinu ➜ Permukaan Respons (Heatmap 2D)",
+        "Jenis Hari ➜ Hari Kerja vs Libur (Bar + CI)",
+        "Dekomposisi Musiman ➜ Tren, Musiman, Residual (FFT)"
     ]
 )
 
-fdf = df[(df["dteday"] >= start_d) & (df["dteday"] <= end_d)].copy()
-if fdf.empty:
+measure = st.sidebar.selectbox("Pilih Ukuran", list(MEASURES))
+M, M_LABEL = MEASURES[measure]
+
+active_parts = select_partitions(partitions, stations, periods)
+aggs = compute_aggregates(active_parts, periods, source, tuple(stations), backend)
+# Jumlah baris terpilih (per periode) langsung dari agregat, tanpa menyaring data mentah
+selected_rows = int(aggs["weather"]["n"].sum())
+if selected_rows == 0:
     st.warning("Tidak ada data pada rentang tanggal yang dipilih.")
     st.stop()
+latest = latest_days(aggs)
 
 # =========================================================
 # HEADER
 # =========================================================
 st.markdown("# 📊 Dashboard Analisis Penyewaan Sepeda")
-st.caption(f"Data range: {start_d.date()} to {end_d.date()}")
+if compare:
+    st.caption(f"Periode A: {period_text[PERIOD_A]} • Periode B: {period_text[PERIOD_B]}")
+else:
+    st.caption(f"Data range: {start_d.date()} to {end_d.date()}")
+if len(all_stations) > 1:
+    st.caption(f"Stasiun: {', '.join(stations)}")
+if M != "cnt":
+    st.caption(f"Ukuran: {measure}")
+
+# =========================================================
+# MODE PERBANDINGAN — DUA PERIODE DARI SATU AGREGASI
+# =========================================================
+if compare:
+    if analysis == "Cuaca ➜ Rata-rata Penyewaan (Line)":
+        st.subheader("Rata-rata Penyewaan per Kondisi Cuaca — Perbandingan Periode")
+        view = period_view("weather")
+        view["Kondisi Cuaca"] = view["weathersit"].map(weather_label)
+        order = ["Clear", "Mist/Cloudy", "Light Rain/Snow", "Heavy Rain/Snow"]
+        wide = compare_wide(view, "Kondisi Cuaca", order=order)
+        show_period_comparison(wide, "Kondisi Cuaca", "Rata-rata penyewaan per kondisi cuaca", M_LABEL)
+
+    elif analysis == "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)":
+        st.subheader("Pola Penyewaan Jam × Hari — Perbandingan Periode")
+        st.caption("Pada mode perbandingan, pola dihitung dari seluruh tanggal di setiap periode (tidak dibatasi 2011).")
+
+        view = period_view("hourly", ["weekday", "hr"])
+        view["weekday_name"] = view["weekday"].apply(lambda x: weekday_labels[int(x) % 7])
+        grids = {
+            label: view[view["period"] == label].pivot(index="weekday_name", columns="hr", values=M)
+            .reindex(index=weekday_labels, columns=range(24))
+            for label in (PERIOD_A, PERIOD_B)
+        }
+        delta = grids[PERIOD_B] - grids[PERIOD_A]
+        for label, grid in [(PERIOD_A, grids[PERIOD_A]), (PERIOD_B, grids[PERIOD_B]), (DELTA_COL, delta)]:
+            export_table(f"jam_x_hari_{label}", grid.reset_index())
+
+        c1, c2 = st.columns(2)
+        for col, label in zip((c1, c2), (PERIOD_A, PERIOD_B)):
+            with col:
+                fig, ax = plt.subplots(figsize=(9, 4))
+                sns.heatmap(grids[label], cmap="YlOrRd", linewidths=0.3, ax=ax)
+                ax.set_title(f"{label} ({period_text[label]})", fontsize=12, weight="bold")
+                ax.set_xlabel("Jam (0–23)")
+                ax.set_ylabel("Hari")
+                draw(fig)
+
+        fig, ax = plt.subplots(figsize=(12, 5))
+        sns.heatmap(delta, cmap="RdBu_r", center=0, linewidths=0.3, ax=ax)
+        ax.set_title("Selisih Rata-rata Penyewaan (B − A) per Jam × Hari", fontsize=13, weight="bold")
+        ax.set_xlabel("Jam (0–23)")
+        ax.set_ylabel("Hari")
+        ax.tick_params(axis="y", labelrotation=0)
+        draw(fig)
+
+        cells = delta.stack().rename(DELTA_COL).reset_index()
+        if cells.empty:
+            st.info("Salah satu periode tidak memiliki data untuk dibandingkan.")
+        else:
+            up = cells.loc[cells[DELTA_COL].idxmax()]
+            down = cells.loc[cells[DELTA_COL].idxmin()]
+            show_insight_cards(
+                peak_label=f"{up['weekday_name']} (jam {int(up['hr'])})",
+                peak_value=f"selisih terbesar ≈ {fmt_measure(up[DELTA_COL])}",
+                low_label=f"{down['weekday_name']} (jam {int(down['hr'])})",
+                low_value=f"selisih terkecil ≈ {fmt_measure(down[DELTA_COL])}",
+                gap_label=f"≈ {fmt_measure(cells[DELTA_COL].mean())}",
+                gap_value="rata-rata selisih (B − A)",
+                conclusion_html=(
+                    f"Perubahan terbesar dari Periode A ke Periode B terjadi pada <b>{up['weekday_name']}</b> "
+                    f"di <b>jam {int(up['hr'])}</b>."
+                )
+            )
+
+    elif analysis == "Pola Bulanan 2011 ➜ Bar Chart":
+        st.subheader("Rata-rata Penyewaan per Bulan — Perbandingan Periode")
+        st.caption("Pada mode perbandingan, pola dihitung dari seluruh tanggal di setiap periode (tidak dibatasi 2011).")
+        view = period_view("monthly", ["mnth"])
+        view["Bulan"] = view["mnth"].apply(lambda x: month_labels[int(x) - 1])
+        wide = compare_wide(view, "Bulan", order=[m for m in month_labels if m in set(view["Bulan"])])
+        show_period_comparison(wide, "Bulan", "Rata-rata penyewaan per bulan", M_LABEL, kind="bar")
+
+    elif analysis == "Tren Musim 2011–2012 ➜ Area Line":
+        st.subheader("Rata-rata Penyewaan per Musim — Perbandingan Periode")
+        view = period_view("season")
+        view["Musim"] = view["season"].map(season_labels)
+        wide = compare_wide(view, "Musim", order=["Spring", "Summer", "Fall", "Winter"])
+        show_period_comparison(wide, "Musim", "Rata-rata penyewaan per musim", M_LABEL)
+
+    elif analysis == "RFM ➜ (Recency Bar H, Scatter F–M, Histogram M)":
+        st.subheader("Analisis RFM — Perbandingan Periode")
+
+        view = rfm_view(period_view("rfm_month"))
+        view["Bulan"] = view["mnth"].apply(lambda x: month_labels[int(x) - 1])
+        months = [m for m in month_labels if m in set(view["Bulan"])]
+
+        st.write("Frequency per bulan:")
+        freq_wide = compare_wide(view, "Bulan", "frequency", order=months)
+        st.dataframe(freq_wide, use_container_width=True)
+        export_table("Frequency per Bulan", freq_wide)
+
+        st.markdown("### A. Recency per Musim")
+        season_view = period_view("season")
+        season_view["Musim"] = season_view["season"].map(season_labels)
+        wide = compare_wide(season_view, "Musim", "recency", order=["Spring", "Summer", "Fall", "Winter"])
+        show_period_comparison(wide, "Musim", "Rata-rata Recency per Musim", "Rata-rata hari sejak aktivitas terakhir", kind="bar", nd=0)
+
+        st.divider()
+
+        st.markdown("### B. Monetary per Bulan")
+        wide = compare_wide(view, "Bulan", "monetary", order=months)
+        show_period_comparison(wide, "Bulan", f"Monetary ({monetary_label()}) per Bulan", monetary_label(), kind="bar")
+
+    elif analysis == "Korelasi ➜ Heatmap Variabel Numerik":
+        st.subheader("Korelasi antar Variabel Numerik — Perbandingan Periode")
+
+        accs = aggs[CORR_KEY]
+        if any(accs.get(label) is None or accs[label].n < 3 for label in (PERIOD_A, PERIOD_B)):
+            st.warning("Data terlalu sedikit untuk menghitung korelasi pada salah satu periode.")
+            st.stop()
+        corr_a, corr_b = accs[PERIOD_A].correlation(), accs[PERIOD_B].correlation()
+        export_table("Korelasi Periode A", corr_a.reset_index(names="Variabel"))
+        export_table("Korelasi Periode B", corr_b.reset_index(names="Variabel"))
+
+        fig, ax = plt.subplots(figsize=(11, 8))
+        sns.heatmap(corr_b - corr_a, cmap="RdBu_r", center=0, annot=True, fmt=".2f",
+                    annot_kws={"size": 8}, linewidths=0.3, ax=ax)
+        ax.set_title("Selisih Korelasi (B − A)", fontsize=13, weight="bold")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.tick_params(axis="y", labelrotation=0)
+        draw(fig)
+
+        drop = ["cnt", "casual", "registered", "casual_share"]
+        wide = pd.DataFrame({
+            "Variabel": corr_a[M].drop(drop, errors="ignore").index,
+            PERIOD_A: corr_a[M].drop(drop, errors="ignore").values,
+            PERIOD_B: corr_b[M].drop(drop, errors="ignore").values,
+        })
+        wide[DELTA_COL] = wide[PERIOD_B] - wide[PERIOD_A]
+        show_period_comparison(wide, "Variabel", f"Korelasi dengan {M} per periode", "Korelasi (r)", kind="bar", nd=3)
+
+    elif analysis == "Cuaca Kontinu ➜ Permukaan Respons (Heatmap 2D)":
+        st.subheader("Permukaan Respons Cuaca — Perbandingan Periode")
+
+        x_col, y_col, grids, min_count = surface_controls()
+        mean_a = measure_surface(grids, start_d, end_d, min_count)
+        mean_b = measure_surface(grids, start_b, end_b, min_count)
+
+        c1, c2 = st.columns(2)
+        with c1:
+            draw_surface(mean_a, grids, x_col, y_col, f"{PERIOD_A} ({period_text[PERIOD_A]})")
+        with c2:
+            draw_surface(mean_b, grids, x_col, y_col, f"{PERIOD_B} ({period_text[PERIOD_B]})")
+        draw_surface(mean_b - mean_a, grids, x_col, y_col, "Selisih Rata-rata Penyewaan (B − A)",
+                     cmap="RdBu_r", center=0)
+        for label, (ps, pe) in [(PERIOD_A, (start_d, end_d)), (PERIOD_B, (start_b, end_b))]:
+            _, counts = grids.surface(ps, pe)
+            export_table(f"Permukaan {label}", surface_cells(measure_surface(grids, ps, pe, min_count), counts, grids, x_col, y_col))
+
+    elif analysis == "Jenis Hari ➜ Hari Kerja vs Libur (Bar + CI)":
+        st.subheader("Rata-rata Penyewaan per Jenis Hari — Perbandingan Periode")
+        view = period_view("daytype")
+        view["Jenis Hari"] = day_type_names(view)
+        order = [d for d in day_type_labels.values() if d in set(view["Jenis Hari"])]
+        wide = compare_wide(view, "Jenis Hari", order=order)
+        show_period_comparison(wide, "Jenis Hari", "Rata-rata penyewaan per jenis hari", M_LABEL, kind="bar")
+
+    elif analysis == "Dekomposisi Musiman ➜ Tren, Musiman, Residual (FFT)":
+        st.subheader("Kekuatan Komponen Musiman — Perbandingan Periode")
+        views = []
+        for label in (PERIOD_A, PERIOD_B):
+            result = compute_decomposition(label, M, periods, source, tuple(stations), backend)
+            if result is not None:
+                views.append(strength_table(result[2]).assign(period=label))
+        if not views:
+            st.info("Setiap periode perlu minimal 2 hari data untuk dekomposisi.")
+        else:
+            view = pd.concat(views, ignore_index=True)
+            order = [c for c in [*DECOMP_PERIODS, "Residual"] if c in set(view["Komponen"])]
+            wide = compare_wide(view, "Komponen", value_col="Porsi Variansi (%)", order=order)
+            show_period_comparison(wide, "Komponen", "Porsi variansi per komponen", "Porsi Variansi (%)", kind="bar", nd=1)
 
 # =========================================================
 # 1) CUACA — LINE
 # =========================================================
-if analysis == "Cuaca ➜ Rata-rata Penyewaan (Line)":
+elif analysis == "Cuaca ➜ Rata-rata Penyewaan (Line)":
     st.subheader("Rata-rata Penyewaan per Kondisi Cuaca")
 
-    avg_weather = fdf.groupby("weathersit")["cnt"].mean().reset_index()
+    avg_weather = single(period_view("weather"))[["weathersit", M]]
+    ci, reps = ci_view(["weathersit"])
+    avg_weather = avg_weather.merge(ci, on="weathersit", how="left")
     avg_weather["weather"] = avg_weather["weathersit"].map(weather_label)
 
     order = ["Clear", "Mist/Cloudy", "Light Rain/Snow", "Heavy Rain/Snow"]
     plot_df = avg_weather.set_index("weather").reindex(order).reset_index()
 
     st.write("Rata-rata penyewaan berdasarkan kondisi cuaca (tabel):")
-    table_df = plot_df[["weather", "cnt"]].rename(columns={"weather": "Kondisi Cuaca", "cnt": "Rata-rata Penyewaan"})
-    st.dataframe(highlight_best_worst(table_df, "Rata-rata Penyewaan"), use_container_width=True)
+    table_df = plot_df[["weather", M, CI_LO, CI_HI]].rename(columns={"weather": "Kondisi Cuaca", M: M_LABEL})
+    st.dataframe(highlight_best_worst(table_df, M_LABEL), use_container_width=True)
+    export_table("Rata-rata per Kondisi Cuaca", table_df)
+    ci_caption()
 
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(plot_df["weather"], plot_df["cnt"], marker="o", linewidth=2, color="#1E90FF")
+    ax.plot(plot_df["weather"], plot_df[M], marker="o", linewidth=2, color="#1E90FF")
+    ax.errorbar(plot_df["weather"], plot_df[M], yerr=ci_errors(plot_df, M), fmt="none", ecolor="#1E90FF", capsize=5, alpha=0.7)
     ax.set_title("Rata-rata penyewaan sepeda berdasarkan kondisi cuaca")
     ax.set_xlabel("Kondisi Cuaca")
-    ax.set_ylabel("Rata-rata Jumlah Penyewaan (cnt)")
+    ax.set_ylabel(M_LABEL)
     ax.grid(True, linestyle="--", alpha=0.5)
     draw(fig)
 
-    max_row = plot_df.loc[plot_df["cnt"].idxmax()]
-    min_row = plot_df.loc[plot_df["cnt"].idxmin()]
-    gap = float(max_row["cnt"] - min_row["cnt"])
+    max_row = plot_df.loc[plot_df[M].idxmax()]
+    min_row = plot_df.loc[plot_df[M].idxmin()]
+    gap = float(max_row[M] - min_row[M])
+    gap_lo, gap_hi = gap_ci(reps, max_row, min_row)
 
     show_insight_cards(
         peak_label=str(max_row["weather"]),
-        peak_value=f"≈ {pretty_int(max_row['cnt'])} penyewaan",
+        peak_value=f"≈ {fmt_measure(max_row[M])} penyewaan ({CI_TEXT} {fmt_measure(max_row[CI_LO])}–{fmt_measure(max_row[CI_HI])})",
         low_label=str(min_row["weather"]),
-        low_value=f"≈ {pretty_int(min_row['cnt'])} penyewaan",
-        gap_label=f"≈ {pretty_int(gap)}",
-        gap_value="selisih rata-rata",
+        low_value=f"≈ {fmt_measure(min_row[M])} penyewaan ({CI_TEXT} {fmt_measure(min_row[CI_LO])}–{fmt_measure(min_row[CI_HI])})",
+        gap_label=f"≈ {fmt_measure(gap)}",
+        gap_value=f"selisih rata-rata ({CI_TEXT} {fmt_measure(gap_lo)}–{fmt_measure(gap_hi)})",
         conclusion_html=(
             f"Rata-rata penyewaan tertinggi terjadi saat cuaca <b>{max_row['weather']}</b>, "
-            f"dan terendah saat cuaca <b>{min_row['weather']}</b>."
+            f"dan terendah saat cuaca <b>{min_row['weather']}</b>. {gap_verdict(gap_lo, gap_hi)}"
         )
     )
 
@@ -292,24 +934,24 @@ if analysis == "Cuaca ➜ Rata-rata Penyewaan (Line)":
 elif analysis == "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)":
     st.subheader("Pola Penyewaan Sepeda berdasarkan Jam dan Hari (2011)")
 
-    hour_2011 = fdf[fdf["yr"] == 0].copy()
-    if hour_2011.empty:
+    hourly_pattern = single(period_view("hourly"))
+    hourly_pattern = hourly_pattern[hourly_pattern["yr"] == 0][["weekday", "hr", M]].reset_index(drop=True)
+    if hourly_pattern.empty:
         st.warning("Data 2011 tidak ada pada rentang tanggal yang dipilih.")
         st.stop()
 
-    hourly_pattern = hour_2011.groupby(["weekday", "hr"])["cnt"].mean().reset_index()
     hourly_pattern["weekday_name"] = hourly_pattern["weekday"].apply(lambda x: weekday_labels[int(x) % 7])
 
     st.write("Tabel ringkas pola penyewaan (2011):")
 
-    top_hours = hourly_pattern.groupby("hr")["cnt"].mean().reset_index().sort_values("cnt", ascending=False).head(3)
+    top_hours = hourly_pattern.groupby("hr")[M].mean().reset_index().sort_values(M, ascending=False).head(3)
     top_hours["Jam"] = top_hours["hr"].astype(int)
-    top_hours["Rata-rata Penyewaan"] = top_hours["cnt"].round(1)
-    top_hours = top_hours[["Jam", "Rata-rata Penyewaan"]]
+    top_hours[M_LABEL] = top_hours[M].round(1)
+    top_hours = top_hours[["Jam", M_LABEL]]
 
-    top_days = hourly_pattern.groupby("weekday_name")["cnt"].mean().reset_index().sort_values("cnt", ascending=False).head(3)
-    top_days["Rata-rata Penyewaan"] = top_days["cnt"].round(1)
-    top_days = top_days.rename(columns={"weekday_name": "Hari"})[["Hari", "Rata-rata Penyewaan"]]
+    top_days = hourly_pattern.groupby("weekday_name")[M].mean().reset_index().sort_values(M, ascending=False).head(3)
+    top_days[M_LABEL] = top_days[M].round(1)
+    top_days = top_days.rename(columns={"weekday_name": "Hari"})[["Hari", M_LABEL]]
 
     c1, c2 = st.columns(2)
     with c1:
@@ -319,21 +961,25 @@ elif analysis == "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)":
         st.markdown("**Top 3 Hari Paling Ramai**")
         st.dataframe(top_days, use_container_width=True)
 
-    peak_per_day = hourly_pattern.loc[hourly_pattern.groupby("weekday_name")["cnt"].idxmax()].copy()
-    peak_per_day = peak_per_day[["weekday_name", "hr", "cnt"]].rename(
-        columns={"weekday_name": "Hari", "hr": "Jam Puncak", "cnt": "Rata-rata Penyewaan"}
+    peak_per_day = hourly_pattern.loc[hourly_pattern.groupby("weekday_name")[M].idxmax()].copy()
+    peak_per_day = peak_per_day[["weekday_name", "hr", M]].rename(
+        columns={"weekday_name": "Hari", "hr": "Jam Puncak", M: M_LABEL}
     )
     peak_per_day["Jam Puncak"] = peak_per_day["Jam Puncak"].astype(int)
-    peak_per_day["Rata-rata Penyewaan"] = peak_per_day["Rata-rata Penyewaan"].round(1)
+    peak_per_day[M_LABEL] = peak_per_day[M_LABEL].round(1)
     peak_per_day = peak_per_day.set_index("Hari").reindex(weekday_labels).reset_index()
 
     st.markdown("**Jam Puncak di Setiap Hari**")
     st.dataframe(peak_per_day, use_container_width=True)
+    export_table("Top 3 Jam", top_hours)
+    export_table("Top 3 Hari", top_days)
+    export_table("Jam Puncak per Hari", peak_per_day)
 
     st.divider()
 
-    pivot_hourly = hourly_pattern.pivot(index="weekday_name", columns="hr", values="cnt")
+    pivot_hourly = hourly_pattern.pivot(index="weekday_name", columns="hr", values=M)
     pivot_hourly = pivot_hourly.reindex(index=weekday_labels)
+    export_table("Jam x Hari 2011", pivot_hourly.reset_index())
 
     fig, ax = plt.subplots(figsize=(12, 5))
     sns.heatmap(pivot_hourly, cmap="YlOrRd", linewidths=0.3, annot=False, ax=ax)
@@ -344,19 +990,19 @@ elif analysis == "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)":
     ax.tick_params(axis="y", labelrotation=0)
     draw(fig)
 
-    peak_combo = hourly_pattern.loc[hourly_pattern["cnt"].idxmax()]
+    peak_combo = hourly_pattern.loc[hourly_pattern[M].idxmax()]
     peak_hour = int(top_hours.iloc[0]["Jam"])
-    peak_hour_val = float(top_hours.iloc[0]["Rata-rata Penyewaan"])
+    peak_hour_val = float(top_hours.iloc[0][M_LABEL])
     peak_day = str(top_days.iloc[0]["Hari"])
-    peak_day_val = float(top_days.iloc[0]["Rata-rata Penyewaan"])
+    peak_day_val = float(top_days.iloc[0][M_LABEL])
 
     show_insight_cards(
         peak_label=f"{peak_combo['weekday_name']} (jam {int(peak_combo['hr'])})",
-        peak_value=f"≈ {pretty_int(peak_combo['cnt'])} rata-rata",
+        peak_value=f"≈ {fmt_measure(peak_combo[M])} rata-rata",
         low_label=f"{peak_day}",
-        low_value=f"≈ {pretty_int(peak_day_val)} rata-rata per hari",
+        low_value=f"≈ {fmt_measure(peak_day_val)} rata-rata per hari",
         gap_label=f"Jam {peak_hour}",
-        gap_value=f"≈ {pretty_int(peak_hour_val)} rata-rata",
+        gap_value=f"≈ {fmt_measure(peak_hour_val)} rata-rata",
         conclusion_html=(
             f"Penyewaan cenderung memuncak pada jam tertentu dan berbeda antar hari. "
             f"Kombinasi paling ramai terjadi pada <b>{peak_combo['weekday_name']}</b> di <b>jam {int(peak_combo['hr'])}</b>."
@@ -369,36 +1015,37 @@ elif analysis == "Pola Waktu 2011 ➜ Jam × Hari (Heatmap)":
 elif analysis == "Pola Bulanan 2011 ➜ Bar Chart":
     st.subheader("Rata-rata Penyewaan Sepeda per Bulan (2011)")
 
-    hour_2011 = fdf[fdf["yr"] == 0].copy()
-    if hour_2011.empty:
+    monthly_pattern = single(period_view("monthly"))
+    monthly_pattern = monthly_pattern[monthly_pattern["yr"] == 0][["mnth", M]]
+    if monthly_pattern.empty:
         st.warning("Data 2011 tidak ada pada rentang tanggal yang dipilih.")
         st.stop()
-
-    monthly_pattern = hour_2011.groupby("mnth")["cnt"].mean().reset_index()
+    monthly_pattern = monthly_pattern.sort_values("mnth").reset_index(drop=True)
     monthly_pattern["Bulan"] = monthly_pattern["mnth"].apply(lambda x: month_labels[int(x) - 1])
 
     st.write("Rata-rata penyewaan per bulan (tabel):")
-    table_df = monthly_pattern[["Bulan", "cnt"]].rename(columns={"cnt": "Rata-rata Penyewaan"})
-    st.dataframe(highlight_best_worst(table_df, "Rata-rata Penyewaan"), use_container_width=True)
+    table_df = monthly_pattern[["Bulan", M]].rename(columns={M: M_LABEL})
+    st.dataframe(highlight_best_worst(table_df, M_LABEL), use_container_width=True)
+    export_table("Rata-rata per Bulan 2011", table_df)
 
     fig, ax = plt.subplots(figsize=(10, 5))
-    sns.barplot(x="Bulan", y="cnt", data=monthly_pattern, palette="YlGnBu", ax=ax)
+    sns.barplot(x="Bulan", y=M, data=monthly_pattern, palette="YlGnBu", ax=ax)
     ax.set_title("Rata-rata Penyewaan Sepeda per Bulan (2011)", fontsize=13, weight="bold")
     ax.set_xlabel("Bulan")
-    ax.set_ylabel("Rata-rata Jumlah Penyewaan")
+    ax.set_ylabel(M_LABEL)
     ax.grid(axis="y", linestyle="--", alpha=0.6)
     draw(fig)
 
-    peak = monthly_pattern.loc[monthly_pattern["cnt"].idxmax()]
-    low  = monthly_pattern.loc[monthly_pattern["cnt"].idxmin()]
-    gap  = float(peak["cnt"] - low["cnt"])
+    peak = monthly_pattern.loc[monthly_pattern[M].idxmax()]
+    low  = monthly_pattern.loc[monthly_pattern[M].idxmin()]
+    gap  = float(peak[M] - low[M])
 
     show_insight_cards(
         peak_label=str(peak["Bulan"]),
-        peak_value=f"≈ {pretty_int(peak['cnt'])} rata-rata",
+        peak_value=f"≈ {fmt_measure(peak[M])} rata-rata",
         low_label=str(low["Bulan"]),
-        low_value=f"≈ {pretty_int(low['cnt'])} rata-rata",
-        gap_label=f"≈ {pretty_int(gap)}",
+        low_value=f"≈ {fmt_measure(low[M])} rata-rata",
+        gap_label=f"≈ {fmt_measure(gap)}",
         gap_value="selisih rata-rata",
         conclusion_html=(
             f"Bulan teramai adalah <b>{peak['Bulan']}</b>, sedangkan bulan tersepi adalah <b>{low['Bulan']}</b>."
@@ -411,38 +1058,45 @@ elif analysis == "Pola Bulanan 2011 ➜ Bar Chart":
 elif analysis == "Tren Musim 2011–2012 ➜ Area Line":
     st.subheader("Rata-rata Penyewaan Sepeda Berdasarkan Musim (2011–2012)")
 
-    season_pattern = fdf.groupby("season")["cnt"].mean().reset_index()
+    season_pattern = single(period_view("season"))[["season", M]]
+    ci, reps = ci_view(["season"])
+    season_pattern = season_pattern.merge(ci, on="season", how="left")
     season_pattern["Musim"] = season_pattern["season"].map(season_labels)
 
     order = ["Spring", "Summer", "Fall", "Winter"]
     plot_df = season_pattern.set_index("Musim").reindex(order).reset_index()
 
     st.write("Rata-rata penyewaan per musim (tabel):")
-    table_df = plot_df[["Musim", "cnt"]].rename(columns={"cnt": "Rata-rata Penyewaan"})
-    st.dataframe(highlight_best_worst(table_df, "Rata-rata Penyewaan"), use_container_width=True)
+    table_df = plot_df[["Musim", M, CI_LO, CI_HI]].rename(columns={M: M_LABEL})
+    st.dataframe(highlight_best_worst(table_df, M_LABEL), use_container_width=True)
+    export_table("Rata-rata per Musim", table_df)
+    ci_caption()
 
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.fill_between(plot_df["Musim"], plot_df["cnt"], color="#FFA500", alpha=0.5)
-    ax.plot(plot_df["Musim"], plot_df["cnt"], marker="o", color="#FF8C00", linewidth=2)
+    ax.fill_between(plot_df["Musim"], plot_df[M], color="#FFA500", alpha=0.5)
+    ax.plot(plot_df["Musim"], plot_df[M], marker="o", color="#FF8C00", linewidth=2)
+    ax.errorbar(plot_df["Musim"], plot_df[M], yerr=ci_errors(plot_df, M), fmt="none", ecolor="#B45309", capsize=5)
     ax.set_title("Rata-rata Penyewaan Sepeda Berdasarkan Musim (2011–2012)", fontsize=13, weight="bold")
     ax.set_xlabel("Musim")
-    ax.set_ylabel("Rata-rata Jumlah Penyewaan")
+    ax.set_ylabel(M_LABEL)
     ax.grid(axis="y", linestyle="--", alpha=0.4)
     draw(fig)
 
-    peak = plot_df.loc[plot_df["cnt"].idxmax()]
-    low  = plot_df.loc[plot_df["cnt"].idxmin()]
-    gap  = float(peak["cnt"] - low["cnt"])
+    peak = plot_df.loc[plot_df[M].idxmax()]
+    low  = plot_df.loc[plot_df[M].idxmin()]
+    gap  = float(peak[M] - low[M])
+    gap_lo, gap_hi = gap_ci(reps, peak, low)
 
     show_insight_cards(
         peak_label=str(peak["Musim"]),
-        peak_value=f"≈ {pretty_int(peak['cnt'])} rata-rata",
+        peak_value=f"≈ {fmt_measure(peak[M])} rata-rata ({CI_TEXT} {fmt_measure(peak[CI_LO])}–{fmt_measure(peak[CI_HI])})",
         low_label=str(low["Musim"]),
-        low_value=f"≈ {pretty_int(low['cnt'])} rata-rata",
-        gap_label=f"≈ {pretty_int(gap)}",
-        gap_value="selisih rata-rata",
+        low_value=f"≈ {fmt_measure(low[M])} rata-rata ({CI_TEXT} {fmt_measure(low[CI_LO])}–{fmt_measure(low[CI_HI])})",
+        gap_label=f"≈ {fmt_measure(gap)}",
+        gap_value=f"selisih rata-rata ({CI_TEXT} {fmt_measure(gap_lo)}–{fmt_measure(gap_hi)})",
         conclusion_html=(
-            f"Musim paling ramai adalah <b>{peak['Musim']}</b>, sedangkan paling rendah adalah <b>{low['Musim']}</b>."
+            f"Musim paling ramai adalah <b>{peak['Musim']}</b>, sedangkan paling rendah adalah <b>{low['Musim']}</b>. "
+            f"{gap_verdict(gap_lo, gap_hi)}"
         )
     )
 
@@ -452,41 +1106,38 @@ elif analysis == "Tren Musim 2011–2012 ➜ Area Line":
 elif analysis == "RFM ➜ (Recency Bar H, Scatter F–M, Histogram M)":
     st.subheader("Analisis RFM")
 
+    m_label = monetary_label()
+    monetary_text = "porsi casual dari total penyewaan bulan itu (%)" if M == "casual_share" else f"total penyewaan (akumulasi {M})"
     st.markdown(
-        """
+        f"""
 RFM digunakan untuk melihat pola aktivitas penyewaan:
 - **Recency**: jarak hari sejak aktivitas terakhir (lebih kecil = lebih baru)
 - **Frequency**: seberapa sering penyewaan terjadi
-- **Monetary**: total jumlah penyewaan (akumulasi cnt)
+- **Monetary**: {monetary_text}
 
 Catatan: pada proyek ini RFM dihitung berdasarkan agregasi waktu (per bulan), karena dataset tidak memiliki ID pelanggan.
 """
     )
 
-    latest_date = fdf["dteday"].max()
-    fdf["recency"] = (latest_date - fdf["dteday"]).dt.days
-
-    # Frequency & Monetary per bulan
-    freq_per_month = fdf.groupby("mnth")["cnt"].count().reset_index()
-    freq_per_month.columns = ["month", "frequency"]
-
-    monetary_per_month = fdf.groupby("mnth")["cnt"].sum().reset_index()
-    monetary_per_month.columns = ["month", "monetary"]
-
-    rfm_df = freq_per_month.merge(monetary_per_month, on="month")
-    rfm_df["recency"] = fdf.groupby("mnth")["recency"].min().values
+    # Frequency & Monetary per bulan (jumlah baris, total/porsi ukuran terpilih) dan recency minimum
+    rfm_df = single(period_view("rfm_month")).sort_values("mnth").reset_index(drop=True)
+    rfm_df = rfm_view(rfm_df).rename(columns={"mnth": "month"})
+    rfm_df["recency"] = rfm_df["recency_min"]
     rfm_df["Bulan"] = rfm_df["month"].apply(lambda x: month_labels[int(x) - 1])
 
     st.write("Data ringkas RFM per bulan (tabel):")
     st.dataframe(rfm_df[["Bulan", "recency", "frequency", "monetary"]], use_container_width=True)
+    export_table("RFM per Bulan", rfm_df[["Bulan", "recency", "frequency", "monetary"]])
 
     st.divider()
 
     # A) Recency per season
     st.markdown("### A. Recency per Musim")
-    recency_by_season = fdf.groupby("season_name")["recency"].mean().reset_index()
+    recency_by_season = single(period_view("season"))[["season", "recency"]]
+    recency_by_season["season_name"] = recency_by_season["season"].map(season_labels)
     order_season = ["Spring", "Summer", "Fall", "Winter"]
     recency_by_season = recency_by_season.set_index("season_name").reindex(order_season).reset_index()
+    export_table("Recency per Musim", recency_by_season[["season_name", "recency"]])
 
     fig, ax = plt.subplots(figsize=(8, 5))
     sns.barplot(y="season_name", x="recency", data=recency_by_season, palette="cool", ax=ax)
@@ -525,7 +1176,7 @@ Catatan: pada proyek ini RFM dihitung berdasarkan agregasi waktu (per bulan), ka
     )
     ax.set_title("Hubungan Frequency dan Monetary per Bulan", fontsize=13, weight="bold")
     ax.set_xlabel("Frequency (jumlah catatan penyewaan)")
-    ax.set_ylabel("Monetary (total penyewaan)")
+    ax.set_ylabel(f"Monetary ({m_label})")
     ax.grid(True, linestyle="--", alpha=0.4)
     ax.legend(title="Bulan", bbox_to_anchor=(1.02, 1), loc="upper left")
     draw(fig)
@@ -538,14 +1189,14 @@ Catatan: pada proyek ini RFM dihitung berdasarkan agregasi waktu (per bulan), ka
 
     show_insight_cards(
         peak_label=str(max_m["Bulan"]),
-        peak_value=f"Monetary ≈ {pretty_int(max_m['monetary'])}",
+        peak_value=f"Monetary ≈ {fmt_measure(max_m['monetary'])}",
         low_label=str(min_m["Bulan"]),
-        low_value=f"Monetary ≈ {pretty_int(min_m['monetary'])}",
-        gap_label=f"≈ {pretty_int(gap_m)}",
-        gap_value="selisih total",
+        low_value=f"Monetary ≈ {fmt_measure(min_m['monetary'])}",
+        gap_label=f"≈ {fmt_measure(gap_m)}",
+        gap_value="selisih monetary",
         conclusion_html=(
-            f"Secara umum, semakin tinggi frequency biasanya diikuti total penyewaan (monetary) yang lebih besar. "
-            f"Nilai hubungan sederhana (korelasi) ≈ <b>{pretty_float(corr_fm, 3)}</b>."
+            f"Nilai hubungan sederhana (korelasi) antara frequency dan {m_label.lower()} ≈ <b>{pretty_float(corr_fm, 3)}</b>. "
+            f"Nilai positif berarti bulan dengan frequency lebih tinggi cenderung punya monetary lebih besar."
         )
     )
 
@@ -555,8 +1206,8 @@ Catatan: pada proyek ini RFM dihitung berdasarkan agregasi waktu (per bulan), ka
     st.markdown("### C. Distribusi Monetary per Bulan")
     fig, ax = plt.subplots(figsize=(9, 5))
     sns.histplot(rfm_df["monetary"], bins=6, kde=True, color="#48C9B0", ax=ax)
-    ax.set_title("Distribusi Monetary (Total Penyewaan) per Bulan", fontsize=13, weight="bold")
-    ax.set_xlabel("Total penyewaan per bulan")
+    ax.set_title(f"Distribusi Monetary ({m_label}) per Bulan", fontsize=13, weight="bold")
+    ax.set_xlabel(f"{m_label} per bulan")
     ax.set_ylabel("Jumlah bulan")
     ax.grid(axis="y", linestyle="--", alpha=0.5)
     draw(fig)
@@ -566,18 +1217,285 @@ Catatan: pada proyek ini RFM dihitung berdasarkan agregasi waktu (per bulan), ka
     q3 = float(rfm_df["monetary"].quantile(0.75))
 
     show_insight_cards(
-        peak_label=f"Q3 ≈ {pretty_int(q3)}",
+        peak_label=f"Q3 ≈ {fmt_measure(q3)}",
         peak_value="batas atas (25% bulan teratas)",
-        low_label=f"Q1 ≈ {pretty_int(q1)}",
+        low_label=f"Q1 ≈ {fmt_measure(q1)}",
         low_value="batas bawah (25% bulan terbawah)",
-        gap_label=f"Median ≈ {pretty_int(med)}",
+        gap_label=f"Median ≈ {fmt_measure(med)}",
         gap_value="nilai tengah",
         conclusion_html=(
             f"Sebagian besar bulan berada di sekitar median. Bulan yang jauh di atas Q3 dapat dianggap sebagai "
-            f"periode yang lebih ramai dibandingkan bulan lainnya."
+            f"periode dengan {m_label.lower()} lebih tinggi dibandingkan bulan lainnya."
         )
     )
 
+# =========================================================
+# 5) KORELASI — HEATMAP
+# =========================================================
+elif analysis == "Korelasi ➜ Heatmap Variabel Numerik":
+    st.subheader("Korelasi antar Variabel Numerik")
+
+    acc = aggs[CORR_KEY].get(PERIOD_A)
+    if acc is None or acc.n < 3:
+        st.warning("Data terlalu sedikit untuk menghitung korelasi.")
+        st.stop()
+    corr = acc.correlation()
+    export_table("Matriks Korelasi", corr.reset_index(names="Variabel"))
+
+    st.caption(f"Dihitung secara streaming dari {acc.n:,} baris (gabungan akumulator per chunk dan per partisi).")
+
+    fig, ax = plt.subplots(figsize=(11, 8))
+    sns.heatmap(corr, cmap="coolwarm", vmin=-1, vmax=1, annot=True, fmt=".2f",
+                annot_kws={"size": 8}, linewidths=0.3, ax=ax)
+    ax.set_title("Matriks Korelasi Variabel Numerik", fontsize=13, weight="bold")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.tick_params(axis="y", labelrotation=0)
+    draw(fig)
+
+    # cnt, casual, registered & porsi casual saling terkait langsung, jadi tidak dihitung sebagai faktor
+    cnt_corr = corr[M].drop(["cnt", "casual", "registered", "casual_share"], errors="ignore").dropna()
+    table_df = cnt_corr.sort_values(ascending=False).reset_index()
+    table_df.columns = ["Variabel", f"Korelasi dengan {M}"]
+    st.write("Korelasi setiap variabel terhadap jumlah penyewaan (tabel):")
+    st.dataframe(highlight_best_worst(table_df, f"Korelasi dengan {M}"), use_container_width=True)
+    export_table(f"Korelasi dengan {M}", table_df)
+
+    if not cnt_corr.empty:
+        top_var, low_var = cnt_corr.idxmax(), cnt_corr.idxmin()
+        show_insight_cards(
+            peak_label=str(top_var),
+            peak_value=f"r ≈ {pretty_float(cnt_corr[top_var], 3)}",
+            low_label=str(low_var),
+            low_value=f"r ≈ {pretty_float(cnt_corr[low_var], 3)}",
+            gap_label=f"≈ {pretty_float(cnt_corr[top_var] - cnt_corr[low_var], 3)}",
+            gap_value="selisih korelasi",
+            conclusion_html=(
+                f"Variabel dengan hubungan positif terkuat terhadap penyewaan adalah <b>{top_var}</b>, "
+                f"sedangkan hubungan paling negatif ada pada <b>{low_var}</b>."
+            )
+        )
+
+# =========================================================
+# 6) CUACA KONTINU — PERMUKAAN RESPONS
+# =========================================================
+elif analysis == "Cuaca Kontinu ➜ Permukaan Respons (Heatmap 2D)":
+    st.subheader("Permukaan Respons: Rata-rata Penyewaan menurut Dua Variabel Cuaca")
+
+    x_col, y_col, grids, min_count = surface_controls()
+    _, counts = grids.surface(start_d, end_d)
+    mean = measure_surface(grids, start_d, end_d, min_count)
+
+    cells = surface_cells(mean, counts, grids, x_col, y_col)
+    export_table(f"Permukaan {x_col} x {y_col}", cells)
+    if cells.empty:
+        st.warning("Tidak ada sel dengan data yang cukup pada rentang tanggal ini.")
+        st.stop()
+
+    st.write("Top 5 kombinasi dengan rata-rata penyewaan tertinggi (tabel):")
+    top_cells = cells.sort_values(M_LABEL, ascending=False).head(5).reset_index(drop=True)
+    st.dataframe(top_cells.round({M_LABEL: 1}), use_container_width=True)
+
+    draw_surface(mean, grids, x_col, y_col, f"Rata-rata Penyewaan per {x_col} × {y_col}")
+
+    best = cells.loc[cells[M_LABEL].idxmax()]
+    worst = cells.loc[cells[M_LABEL].idxmin()]
+    gap = float(best[M_LABEL] - worst[M_LABEL])
+
+    show_insight_cards(
+        peak_label=f"{x_col} {best[x_col]}",
+        peak_value=f"{y_col} {best[y_col]} • ≈ {fmt_measure(best[M_LABEL])} rata-rata",
+        low_label=f"{x_col} {worst[x_col]}",
+        low_value=f"{y_col} {worst[y_col]} • ≈ {fmt_measure(worst[M_LABEL])} rata-rata",
+        gap_label=f"≈ {fmt_measure(gap)}",
+        gap_value="selisih rata-rata",
+        conclusion_html=(
+            f"Penyewaan tertinggi terjadi saat <b>{x_col} {best[x_col]}</b> dan <b>{y_col} {best[y_col]}</b>, "
+            f"sedangkan terendah saat <b>{x_col} {worst[x_col]}</b> dan <b>{y_col} {worst[y_col]}</b>."
+        )
+    )
+
+# =========================================================
+# 7) JENIS HARI — BAR + CI BOOTSTRAP
+# =========================================================
+elif analysis == "Jenis Hari ➜ Hari Kerja vs Libur (Bar + CI)":
+    st.subheader("Rata-rata Penyewaan: Hari Kerja, Akhir Pekan, dan Hari Libur")
+
+    day_view = single(period_view("daytype"))[["holiday", "workingday", M]]
+    ci, reps = ci_view(["holiday", "workingday"])
+    day_view = day_view.merge(ci, on=["holiday", "workingday"], how="left")
+    day_view["Jenis Hari"] = day_type_names(day_view)
+
+    order = [d for d in day_type_labels.values() if d in set(day_view["Jenis Hari"])]
+    plot_df = day_view.set_index("Jenis Hari").reindex(order).reset_index()
+
+    st.write("Rata-rata penyewaan per jenis hari (tabel):")
+    table_df = plot_df[["Jenis Hari", M, CI_LO, CI_HI]].rename(columns={M: M_LABEL})
+    st.dataframe(highlight_best_worst(table_df, M_LABEL), use_container_width=True)
+    export_table("Rata-rata per Jenis Hari", table_df)
+    ci_caption()
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    colors = ["#1E90FF", "#22C55E", "#FF8C00"][:len(plot_df)]
+    ax.bar(plot_df["Jenis Hari"], plot_df[M], color=colors, yerr=ci_errors(plot_df, M), capsize=8)
+    ax.set_title("Rata-rata penyewaan sepeda per jenis hari", fontsize=13, weight="bold")
+    ax.set_xlabel("Jenis Hari")
+    ax.set_ylabel(M_LABEL)
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+    draw(fig)
+
+    if len(plot_df) < 2:
+        st.info("Rentang tanggal ini hanya berisi satu jenis hari, jadi tidak ada yang dibandingkan.")
+    else:
+        peak = plot_df.loc[plot_df[M].idxmax()]
+        low  = plot_df.loc[plot_df[M].idxmin()]
+        gap  = float(peak[M] - low[M])
+        gap_lo, gap_hi = gap_ci(reps, peak, low)
+
+        show_insight_cards(
+            peak_label=str(peak["Jenis Hari"]),
+            peak_value=f"≈ {fmt_measure(peak[M])} rata-rata ({CI_TEXT} {fmt_measure(peak[CI_LO])}–{fmt_measure(peak[CI_HI])})",
+            low_label=str(low["Jenis Hari"]),
+            low_value=f"≈ {fmt_measure(low[M])} rata-rata ({CI_TEXT} {fmt_measure(low[CI_LO])}–{fmt_measure(low[CI_HI])})",
+            gap_label=f"≈ {fmt_measure(gap)}",
+            gap_value=f"selisih rata-rata ({CI_TEXT} {fmt_measure(gap_lo)}–{fmt_measure(gap_hi)})",
+            conclusion_html=(
+                f"Penyewaan rata-rata paling tinggi pada <b>{peak['Jenis Hari']}</b> dan paling rendah pada "
+                f"<b>{low['Jenis Hari']}</b>. {gap_verdict(gap_lo, gap_hi)}"
+            )
+        )
+
+# =========================================================
+# 8) DEKOMPOSISI MUSIMAN — FFT
+# =========================================================
+elif analysis == "Dekomposisi Musiman ➜ Tren, Musiman, Residual (FFT)":
+    st.subheader("Dekomposisi Musiman Deret Per Jam (FFT)")
+
+    result = compute_decomposition(PERIOD_A, M, periods, source, tuple(stations), backend)
+    if result is None:
+        st.warning("Pilih rentang minimal 2 hari untuk dekomposisi.")
+        st.stop()
+    start, filled, dec = result
+    series_label = M_LABEL if M == "casual_share" else f"Penyewaan per Jam ({measure})"
+    st.caption(
+        f"Deret per jam lengkap: {len(dec.observed):,} jam, {int(filled.sum()):,} jam tanpa data diisi interpolasi. "
+        "Komponen tahunan hanya dipakai jika rentang memuat minimal 2 tahun."
+    )
+
+    decomp_df = decomposition_frame(start, dec)
+    export_table("Dekomposisi per Jam", decomp_df)
+    times = decomp_df["Waktu"]
+
+    rows = 3 + ("Tahunan" in dec.seasonal)
+    fig, axes = plt.subplots(rows, 1, figsize=(11, 2.6 * rows), sharex=True)
+    axes[0].plot(times, dec.observed, color="#94A3B8", linewidth=0.5, label="Observasi")
+    axes[0].plot(times, dec.trend, color="#DC2626", linewidth=2, label="Tren")
+    axes[0].set_title("Observasi & Tren", fontsize=11, weight="bold")
+    axes[0].legend(loc="upper left")
+    ax_i = 1
+    if "Tahunan" in dec.seasonal:
+        axes[ax_i].plot(times, dec.seasonal["Tahunan"], color="#16A34A", linewidth=1.5)
+        axes[ax_i].set_title("Musiman Tahunan", fontsize=11, weight="bold")
+        ax_i += 1
+    short = sum(dec.seasonal.get(n, 0) for n in ("Harian", "Mingguan"))
+    axes[ax_i].plot(times, np.broadcast_to(short, times.shape), color="#1E90FF", linewidth=0.5)
+    axes[ax_i].set_title("Musiman Harian + Mingguan", fontsize=11, weight="bold")
+    axes[ax_i + 1].plot(times, dec.residual, color="#6B7280", linewidth=0.5)
+    axes[ax_i + 1].set_title("Residual", fontsize=11, weight="bold")
+    for ax in axes:
+        ax.set_ylabel(series_label if ax is axes[0] else "")
+        ax.grid(True, linestyle="--", alpha=0.4)
+    fig.tight_layout()
+    draw(fig)
+
+    profile = weekly_profile(start, dec)
+    fig, ax = plt.subplots(figsize=(11, 4))
+    ax.plot(np.arange(168), profile, color="#1E90FF", linewidth=2)
+    ax.axhline(0, color="#6B7280", linewidth=0.8)
+    ax.set_xticks(np.arange(0, 168, 24) + 12)
+    ax.set_xticklabels(weekday_labels)
+    for d in range(1, 7):
+        ax.axvline(d * 24, color="#CBD5E1", linewidth=0.8)
+    ax.set_title("Profil satu minggu (komponen harian + mingguan)", fontsize=13, weight="bold")
+    ax.set_ylabel("Selisih dari tren")
+    draw(fig)
+
+    strength = strength_table(dec)
+    st.write("Porsi variansi (setelah tren dibuang) per komponen:")
+    st.dataframe(strength, use_container_width=True)
+    export_table("Kekuatan Komponen Musiman", strength)
+
+    seasonal_only = strength[strength["Komponen"] != "Residual"]
+    peak = seasonal_only.loc[seasonal_only["Porsi Variansi (%)"].idxmax()]
+    low = seasonal_only.loc[seasonal_only["Porsi Variansi (%)"].idxmin()]
+    resid = float(strength.loc[strength["Komponen"] == "Residual", "Porsi Variansi (%)"].iloc[0])
+    busiest = int(np.nanargmax(profile))
+
+    show_insight_cards(
+        peak_label=str(peak["Komponen"]),
+        peak_value=f"≈ {pretty_float(peak['Porsi Variansi (%)'])}% variansi",
+        low_label=str(low["Komponen"]),
+        low_value=f"≈ {pretty_float(low['Porsi Variansi (%)'])}% variansi",
+        gap_label=f"≈ {pretty_float(resid)}%",
+        gap_value="variansi residual (tidak periodik)",
+        conclusion_html=(
+            f"Pola <b>{peak['Komponen'].lower()}</b> paling kuat membentuk naik-turunnya penyewaan. "
+            f"Puncak pola harian/mingguan jatuh pada <b>{weekday_labels[busiest // 24]} pukul {busiest % 24:02d}.00</b>."
+        )
+    )
+
+# =========================================================
+# UNDUH DATA — dibuat hanya saat diminta
+# =========================================================
+def raw_chunks(periods: list, stations: tuple):
+    # Data mentah terfilter dibaca per potongan dari file Parquet tiap partisi dan langsung diteruskan ke penulis file
+    paths = dataset_files(source)
+    chunks = iter_chunks(paths) if paths is not None else [load_frame(source, read_source)]
+    for chunk in chunks:
+        yield tag_periods(chunk[chunk["station"].isin(stations)], periods)
+
+def build_export(analysis: str, periods: list, stations: tuple, fmt: str, tables: dict, digests: dict, include_raw: bool):
+    # File jadi disimpan di cache disk (LRU bersama hasil analisis), bukan di memori proses.
+    # Kunci: analisis, rentang, stasiun, format, sidik jari data & isi tabel agregat yang kecil
+    key = DiskCache.make_key("export", source, analysis, periods, stations, fmt, include_raw, digests)
+    base = "_".join([analysis.split("➜")[0]] + [f"{s.date()}_{e.date()}" for _, s, e in periods])
+    names = [*tables, "data_terfilter"] if include_raw else list(tables)
+    file_name, mime = export_name(names, fmt, base)
+
+    def write(sink):
+        # Data mentah terfilter baru disaring di sini, hanya jika diminta
+        raw = {"data_terfilter": raw_chunks(periods, stations)} if include_raw else {}
+        export_tables({**tables, **raw}, fmt, sink)
+
+    path = CACHE.file_path(key, file_name)
+    if path is None:
+        with st.spinner("Menyiapkan file unduhan..."):
+            path = CACHE.put_file(key, file_name, write)
+    if path is None:
+        # Lebih besar dari batas cache: dibuat di memori untuk unduhan ini saja
+        buf = io.BytesIO()
+        write(buf)
+        return buf.getvalue(), file_name, mime
+    return path.read_bytes(), file_name, mime
+
+if EXPORTS:
+    st.divider()
+    with st.expander("⬇️ Unduh Data"):
+        c1, c2 = st.columns(2)
+        with c1:
+            fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+        with c2:
+            include_raw = st.checkbox(f"Sertakan data mentah terfilter ({selected_rows:,} baris)")
+        st.caption("Tabel: " + ", ".join(EXPORTS))
+
+        # Isi tabel ikut jadi kunci: ganti ukuran, pasangan variabel, bin, dsb. membuat file lama tidak ditawarkan lagi
+        digests = {name: frame_digest(frame) for name, frame in EXPORTS.items()}
+        export_key = (analysis, tuple(periods), tuple(stations), fmt, include_raw, tuple(digests.items()))
+        if st.button("Siapkan file"):
+            st.session_state["export_key"] = export_key
+        if st.session_state.get("export_key") == export_key:
+            data, file_name, mime = build_export(analysis, periods, tuple(stations), fmt, EXPORTS, digests, include_raw)
+            st.download_button("Unduh file", data, file_name=file_name, mime=mime)
+
 # =========================================================
 # FOOTER
 # =========================================================
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import warnings
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+# =========================================================
+# CACHE DISK (PARQUET, CONTENT-ADDRESSED, LRU)
+# =========================================================
+CACHE_VERSION = 2
+LOCK_STALE_SECONDS = 60
+# Row group Parquet dibatasi agar file besar bisa dibaca bertahap (mis. oleh worker partisi)
+ROW_GROUP_ROWS = 100_000
+
+
+def file_fingerprint(paths):
+    """Sidik jari data dari path, ukuran dan waktu modifikasi file (tanpa membaca isinya)."""
+    out = []
+    for p in paths:
+        stat = os.stat(p)
+        out.append((str(p), stat.st_size, stat.st_mtime_ns))
+    return out
+
+
+def frame_digest(frame):
+    """Sidik jari isi DataFrame (kolom, indeks & nilai), untuk kunci cache yang bergantung pada tabel."""
+    h = hashlib.sha256(json.dumps([str(c) for c in frame.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class DiskCache:
+    """Cache hasil (kumpulan DataFrame) di disk sebagai file Parquet.
+
+    Setiap entri adalah satu folder bernama hash SHA-256 dari kuncinya. Entri
+    ditulis ke folder sementara lalu di-rename (atomik), jadi proses lain tidak
+    pernah membaca entri setengah jadi. Ukuran total dibatasi `max_bytes`;
+    entri yang paling lama tidak dipakai dihapus lebih dulu (LRU). Entri yang
+    sendirian sudah melebihi batas tidak disimpan; `max_bytes=None` berarti tanpa batas.
+    """
+
+    def __init__(self, root, max_bytes=512 * 2**20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.tmp = self.root / "tmp"
+        self.tmp.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        raw = json.dumps([CACHE_VERSION, *parts], default=str, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return self.root / key[:2] / key
+
+    def get(self, key, names=None):
+        # names: hanya baca tabel-tabel ini (mis. metadata kecil tanpa data lengkap)
+        path = self._entry(key)
+        try:
+            files = {unquote(p.stem): p for p in sorted(path.glob("*.parquet"))}
+            if names is not None:
+                files = {name: files[name] for name in names if name in files}
+                if len(files) < len(names):
+                    return None
+            if not files:
+                return None
+            tables = {name: pd.read_parquet(p) for name, p in files.items()}
+            # Waktu modifikasi folder dipakai sebagai waktu akses terakhir (untuk LRU)
+            os.utime(path)
+        except (FileNotFoundError, NotADirectoryError):
+            # Entri dihapus proses lain saat sedang dibaca
+            return None
+        except Exception:
+            self._remove(path)
+            return None
+        return tables
+
+    def table_paths(self, key):
+        """Path file Parquet tiap tabel dalam entri (untuk dibaca langsung, mis. oleh worker lain)."""
+        path = self._entry(key)
+        try:
+            files = {unquote(p.stem): p for p in path.glob("*.parquet")}
+            if files:
+                os.utime(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return {}
+        return files
+
+    def file_path(self, key, name):
+        """Path file biasa (bukan tabel) dalam entri, mis. file ekspor jadi; None jika belum ada."""
+        path = self._entry(key) / name
+        try:
+            os.utime(path.parent)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return path if path.exists() else None
+
+    def put(self, key, tables):
+        def write(work):
+            for name, frame in tables.items():
+                frame.to_parquet(work / f"{quote(name, safe='')}.parquet", row_group_size=ROW_GROUP_ROWS)
+        self._commit(key, write)
+
+    def put_file(self, key, name, write):
+        """Simpan satu file yang ditulis `write(path)` secara bertahap langsung ke disk.
+
+        Mengembalikan path file di cache, atau None jika file melebihi batas ukuran.
+        """
+        if self._commit(key, lambda work: write(work / name)):
+            return self.file_path(key, name)
+        return None
+
+    def _commit(self, key, write):
+        # Tulis ke folder sementara lalu rename; True jika entri (kini) ada di cache
+        final = self._entry(key)
+        if final.exists():
+            return True
+        work = self.tmp / f"{key}.{os.getpid()}.{uuid.uuid4().hex}"
+        work.mkdir(parents=True)
+        try:
+            write(work)
+            size = sum(f.stat().st_size for f in work.iterdir())
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Menyimpannya berarti menghapus semua entri lain lalu entri ini sendiri
+                warnings.warn(
+                    f"Entri cache {size / 2**20:,.0f} MB melebihi batas {self.max_bytes / 2**20:,.0f} MB; tidak disimpan."
+                )
+                shutil.rmtree(work, ignore_errors=True)
+                return False
+            final.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(work, final)
+        except OSError as exc:
+            shutil.rmtree(work, ignore_errors=True)
+            if final.exists():
+                # Proses lain sudah menulis entri yang sama lebih dulu
+                return True
+            # Disk penuh, izin, nama terlalu panjang, dll.: dashboard tetap jalan tanpa cache, tapi jangan diam-diam
+            warnings.warn(f"Entri cache tidak bisa disimpan: {exc}")
+            return False
+        except BaseException:
+            shutil.rmtree(work, ignore_errors=True)
+            raise
+        self.evict()
+        return True
+
+    def _remove(self, path):
+        trash = self.tmp / f"trash.{uuid.uuid4().hex}"
+        try:
+            os.rename(path, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def _acquire_lock(self):
+        lock = self.root / "evict.lock"
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock.unlink()
+            except FileNotFoundError:
+                pass
+            return None
+        os.close(fd)
+        return lock
+
+    def entries(self):
+        out = []
+        for bucket in self.root.iterdir():
+            if bucket == self.tmp or not bucket.is_dir():
+                continue
+            for entry in bucket.iterdir():
+                try:
+                    size = sum(f.stat().st_size for f in entry.iterdir())
+                    out.append((entry.stat().st_mtime, size, entry))
+                except FileNotFoundError:
+                    continue
+        return out
+
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        # Hanya satu proses yang melakukan eviction pada satu waktu; yang lain cukup lewat
+        lock = self._acquire_lock()
+        if lock is None:
+            return
+        try:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(entry)
+                total -= size
+        finally:
+            lock.unlink(missing_ok=True)
@@ -0,0 +1,107 @@
+import re
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# =========================================================
+# EKSPOR BERTAHAP (CHUNK) KE CSV / PARQUET
+# =========================================================
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+CHUNK_ROWS = 100_000
+
+
+def infer_schema(frame, chunksize=CHUNK_ROWS):
+    # Skema diambil dari potongan pertama agar semua potongan bertipe sama
+    schema = pa.RecordBatch.from_pandas(frame.iloc[:chunksize], preserve_index=False).schema
+    for i, name in enumerate(schema.names):
+        col = frame[name]
+        field = schema.field(i)
+        if pa.types.is_null(field.type):
+            # Kolom yang masih kosong di potongan pertama: tipenya diambil dari nilai yang terisi di seluruh frame
+            filled = col[col.notna()]
+            if len(filled):
+                schema = schema.set(i, field.with_type(pa.Array.from_pandas(filled.iloc[:chunksize]).type))
+        elif pa.types.is_timestamp(field.type) and (col == col.dt.normalize()).all():
+            # Kolom tanggal tanpa jam (mis. dteday) ditulis sebagai date, bukan timestamp
+            schema = schema.set(i, field.with_type(pa.date32()))
+    return schema
+
+
+def iter_batches(frame, chunksize=CHUNK_ROWS, schema=None):
+    # Konversi ke Arrow per potongan, jadi tidak ada salinan penuh dari seluruh frame
+    frame = frame.copy(deep=False)
+    frame.columns = [str(c) for c in frame.columns]
+    if schema is None:
+        schema = infer_schema(frame, chunksize)
+    for start in range(0, max(len(frame), 1), chunksize):
+        batch = pa.RecordBatch.from_pandas(frame.iloc[start:start + chunksize], preserve_index=False)
+        yield batch.cast(schema)
+
+
+def write_frames(frames, sink, fmt, chunksize=CHUNK_ROWS):
+    """Tulis satu frame, atau potongan-potongan berurutan (mis. per row group partisi), sebagai satu tabel.
+
+    Skema diambil dari potongan pertama yang berisi; potongan kosong dilewati
+    kecuali semuanya kosong.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    writer, schema, last = None, None, pd.DataFrame()
+    try:
+        for frame in frames:
+            last = frame
+            if frame.empty:
+                continue
+            for batch in iter_batches(frame, chunksize, schema):
+                if writer is None:
+                    schema = batch.schema
+                    writer = _open_writer(sink, schema, fmt)
+                writer.write_batch(batch)
+        if writer is None:
+            (batch,) = iter_batches(last, chunksize)
+            writer = _open_writer(sink, batch.schema, fmt)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _open_writer(sink, schema, fmt):
+    if fmt == "Parquet":
+        return pq.ParquetWriter(sink, schema)
+    return pa_csv.CSVWriter(sink, schema)
+
+
+def safe_name(text):
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(text)).strip("_").lower() or "data"
+
+
+def export_name(table_names, fmt, base_name):
+    """(nama_file, mime) hasil ekspor: satu file jika hanya satu tabel, selain itu arsip ZIP."""
+    ext, mime = EXPORT_FORMATS[fmt]
+    if len(table_names) == 1:
+        return f"{safe_name(base_name)}{ext}", mime
+    return f"{safe_name(base_name)}.zip", "application/zip"
+
+
+def export_tables(tables, fmt, sink):
+    """Tulis tabel ke `sink` (path atau objek file) sesuai `export_name`.
+
+    Nilai `tables` boleh berupa DataFrame atau iterable potongan DataFrame,
+    jadi data besar ditulis bertahap tanpa pernah dimuat utuh.
+    """
+    ext, _ = EXPORT_FORMATS[fmt]
+    if len(tables) == 1:
+        (frames,) = tables.values()
+        write_frames(frames, sink, fmt)
+        return
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, frames in tables.items():
+            with zf.open(f"{safe_name(name)}{ext}", "w") as member:
+                write_frames(frames, member, fmt)
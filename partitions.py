@@ -0,0 +1,256 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analytics import CovarianceAccumulator, accumulate_frame, merge_accumulators
+from validation import validate_frame
+
+# =========================================================
+# PARTISI (STASIUN × TANGGAL)
+# =========================================================
+@dataclass(frozen=True)
+class Partition:
+    """Satu file berbentuk `hour_cleaned.csv` milik satu stasiun dengan rentang tanggalnya."""
+    station: str
+    path: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+    def overlaps(self, periods):
+        return any(self.start <= end and self.end >= start for _, start, end in periods)
+
+
+def scan_partition(station, path):
+    # Cukup baca kolom dteday untuk mengetahui rentang tanggal partisi
+    days = pd.to_datetime(pd.read_csv(path, usecols=["dteday"])["dteday"], errors="coerce")
+    return Partition(station, str(path), days.min(), days.max())
+
+
+def discover_partitions(root):
+    """Cari partisi dengan struktur `root/<stasiun>/*.csv`."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    parts = []
+    for station_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        for path in sorted(station_dir.glob("*.csv")):
+            parts.append(scan_partition(station_dir.name, path))
+    return parts
+
+
+def select_partitions(partitions, stations, periods):
+    return [p for p in partitions if p.station in stations and p.overlaps(periods)]
+
+
+def read_partition(partition):
+    return pd.read_csv(partition.path).assign(station=partition.station)
+
+
+def load_partitions(partitions):
+    return pd.concat([read_partition(p) for p in partitions], ignore_index=True)
+
+
+def validate_partitions(frames):
+    """Validasi semua partisi sekaligus, lalu pecah lagi data bersihnya per partisi.
+
+    `frames` memetakan nama partisi ke data mentahnya. Validasi dijalankan pada
+    gabungan semua partisi, jadi duplikat (stasiun, dteday, hr) antarfile ikut
+    terdeteksi. Mengembalikan (dict nama → data_bersih, karantina, laporan).
+    """
+    names = list(frames)
+    raw = pd.concat(list(frames.values()), ignore_index=True)
+    if "dteday" in raw.columns:
+        raw["dteday"] = pd.to_datetime(raw["dteday"], errors="coerce")
+    clean, quarantine, report = validate_frame(raw)
+    # Indeks baris bersih = posisi di gabungan, jadi asal partisinya bisa dihitung dari panjang tiap frame
+    owner = np.repeat(np.arange(len(names)), [len(f) for f in frames.values()])[clean.index.to_numpy()]
+    parts = {name: clean[owner == i].reset_index(drop=True) for i, name in enumerate(names)}
+    return parts, quarantine, report
+
+# =========================================================
+# AGREGAT PARSIAL (BISA DIGABUNG)
+# =========================================================
+# Setiap tabel parsial menyimpan: n (jumlah baris), <ukuran>_sum untuk semua ukuran
+# sekaligus (untuk rata-rata), day_sum (untuk rata-rata recency) dan day_max
+# (tanggal terbaru → recency minimum).
+MEASURE_COLUMNS = ["cnt", "casual", "registered"]
+PARTIAL_RULES = {
+    "n": "sum", "cnt_sum": "sum", "casual_sum": "sum", "registered_sum": "sum",
+    "day_sum": "sum", "day_max": "max",
+}
+CORR_KEY = "_corr"
+
+# Kunci pengelompokan agregat parsial setiap analisis dashboard (juga dipakai benchmark_backends.py)
+AGG_SPECS = {
+    "weather": ["weathersit"],
+    "hourly": ["yr", "weekday", "hr"],
+    "monthly": ["yr", "mnth"],
+    "season": ["season"],
+    "rfm_month": ["mnth"],
+    "daytype": ["holiday", "workingday"],
+}
+# Kolom numerik untuk analisis korelasi; casual_share diturunkan dari casual/cnt
+CORR_COLUMNS = [
+    "season", "yr", "mnth", "hr", "holiday", "weekday", "workingday", "weathersit",
+    "temp", "atemp", "hum", "windspeed", "casual", "registered", "cnt", "casual_share",
+]
+# Jumlah baris per potongan saat worker membaca file partisi
+CHUNK_ROWS = 100_000
+
+
+def to_day_number(dates):
+    return pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def add_casual_share(frame):
+    # Porsi casual per baris (%); baris dengan cnt = 0 dianggap 0
+    share = (frame["casual"] / frame["cnt"].where(frame["cnt"] > 0)).fillna(0)
+    return frame.assign(casual_share=share * 100)
+
+
+def tag_periods(frame, periods):
+    """Beri label periode pada setiap baris dalam satu lintasan; baris di luar semua periode dibuang.
+
+    `periods` berisi tuple (label, awal, akhir). Baris yang masuk ke dua periode
+    (rentang beririsan) diduplikasi agar terhitung di keduanya.
+    """
+    days = frame["dteday"]
+    masks = [((days >= start) & (days <= end)).to_numpy() for _, start, end in periods]
+    labels = [label for label, _, _ in periods]
+    first = np.select(masks, labels, default="")
+    pieces = [frame.assign(period=first)[first != ""]]
+    seen = masks[0].copy()
+    for label, mask in zip(labels[1:], masks[1:]):
+        overlap = mask & seen
+        if overlap.any():
+            pieces.append(frame[overlap].assign(period=label))
+        seen |= mask
+    return pd.concat(pieces, ignore_index=True) if len(pieces) > 1 else pieces[0]
+
+
+def partial_aggregates(frame, specs, corr_columns=None):
+    """Hitung agregat parsial untuk semua analisis dalam satu kali baca data.
+
+    `frame` sudah diberi label `period`; `specs` memetakan nama analisis ke
+    daftar kolom pengelompokan (selalu ditambah `period` di depan).
+    """
+    work = frame.assign(_day=to_day_number(frame["dteday"]))
+    out = {}
+    for name, keys in specs.items():
+        out[name] = work.groupby(["period"] + list(keys), sort=False).agg(
+            n=("cnt", "size"),
+            cnt_sum=("cnt", "sum"),
+            casual_sum=("casual", "sum"),
+            registered_sum=("registered", "sum"),
+            day_sum=("_day", "sum"),
+            day_max=("_day", "max"),
+        )
+    if corr_columns:
+        if "casual_share" in corr_columns and "casual_share" not in frame.columns:
+            frame = add_casual_share(frame)
+        out[CORR_KEY] = {
+            label: accumulate_frame(g, list(corr_columns)) for label, g in frame.groupby("period", sort=False)
+        }
+    return out
+
+
+def iter_chunks(paths, chunksize=CHUNK_ROWS):
+    """Baca file Parquet partisi tervalidasi per potongan (row group), tanpa memuat satu file utuh."""
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+def _partition_worker(path, periods, specs, corr_columns, chunksize=CHUNK_ROWS):
+    # Membaca data partisi yang sudah divalidasi (Parquet), bukan CSV mentah: parsing & validasi
+    # hanya terjadi sekali saat data dimuat, dan aturan duplikatnya sama dengan data di memori
+    partials = [
+        partial_aggregates(tag_periods(chunk, periods), specs, corr_columns)
+        for chunk in iter_chunks([path], chunksize)
+    ]
+    return merge_partials(partials, specs, corr_columns)
+
+
+def rollup(partial, keys):
+    return partial.groupby(level=list(keys), sort=False).agg(PARTIAL_RULES)
+
+
+def merge_partials(partials, specs, corr_columns=None):
+    merged = {}
+    for name, keys in specs.items():
+        frames = [p[name] for p in partials if not p[name].empty]
+        if frames:
+            merged[name] = rollup(pd.concat(frames), ["period"] + list(keys))
+        else:
+            merged[name] = pd.DataFrame(columns=list(PARTIAL_RULES))
+    if corr_columns:
+        labels = {label for p in partials for label in p[CORR_KEY]}
+        merged[CORR_KEY] = {
+            label: merge_accumulators([p[CORR_KEY][label] for p in partials if label in p[CORR_KEY]], list(corr_columns))
+            for label in labels
+        }
+    return merged
+
+
+def aggregate_partitions(paths, periods, specs, corr_columns=None, executor=None):
+    """Agregat parsial per file partisi tervalidasi (paralel di process pool bila tersedia), lalu digabung."""
+    args = [(str(path), periods, specs, corr_columns) for path in paths]
+    if executor is not None and len(args) > 1:
+        partials = list(executor.map(_partition_worker, *zip(*args)))
+    else:
+        partials = [_partition_worker(*a) for a in args]
+    return merge_partials(partials, specs, corr_columns)
+
+
+def aggregates_to_tables(merged):
+    """Ratakan hasil `merge_partials` menjadi tabel bernama (untuk cache disk)."""
+    tables = {name: part for name, part in merged.items() if name != CORR_KEY}
+    for label, acc in merged.get(CORR_KEY, {}).items():
+        tables[f"{CORR_KEY}/{label}"] = acc.to_frame()
+    return tables
+
+
+def aggregates_from_tables(tables):
+    merged, corr = {}, {}
+    for name, frame in tables.items():
+        if name.startswith(f"{CORR_KEY}/"):
+            corr[name.split("/", 1)[1]] = CovarianceAccumulator.from_frame(frame)
+        else:
+            merged[name] = frame
+    merged[CORR_KEY] = corr
+    return merged
+
+
+def latest_days(merged):
+    """Tanggal terbaru (nomor hari) per periode, acuan perhitungan recency."""
+    frames = [p for name, p in merged.items() if name != CORR_KEY and not p.empty]
+    # Per tabel dulu: tingkat indeks antartabel berbeda, jadi concat langsung bisa kehilangan nama level
+    per_table = [p["day_max"].groupby(level="period").max() for p in frames]
+    return pd.concat(per_table).groupby(level=0).max().rename_axis("period")
+
+
+def finalize(partial, latest):
+    """Ubah agregat parsial menjadi semua ukuran serta recency rata-rata/minimum.
+
+    Kolom `cnt`, `casual`, `registered` berisi rata-rata per baris dan
+    `casual_share` porsi casual (%) dari total. `latest` adalah hasil
+    `latest_days`, sehingga recency dihitung per periode.
+    """
+    out = partial.reset_index()
+    latest_day = out["period"].map(latest)
+    for col in MEASURE_COLUMNS:
+        out[col] = out[f"{col}_sum"] / out["n"]
+    out["casual_share"] = out["casual_sum"] / out["cnt_sum"].where(out["cnt_sum"] > 0) * 100
+    out["recency"] = latest_day - out["day_sum"] / out["n"]
+    out["recency_min"] = latest_day - out["day_max"]
+    return out
+
+
+def make_executor(max_workers=None):
+    # Jangan fork dari server Streamlit yang multithread (bisa deadlock); worker cukup mengimpor modul ini
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver"))
@@ -0,0 +1,148 @@
+import json
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# VALIDASI KUALITAS DATA (SATU LINTASAN, VEKTORISASI)
+# =========================================================
+# Rentang nilai yang valid per kolom; None = tanpa batas atas
+RANGE_RULES = {
+    "season": (1, 4),
+    "yr": (0, None),
+    "mnth": (1, 12),
+    "hr": (0, 23),
+    "holiday": (0, 1),
+    "weekday": (0, 6),
+    "workingday": (0, 1),
+    "weathersit": (1, 4),
+    "temp": (0, 1),
+    "atemp": (0, 1),
+    "hum": (0, 1),
+    "windspeed": (0, 1),
+    "casual": (0, None),
+    "registered": (0, None),
+    "cnt": (0, None),
+}
+INTEGER_COLUMNS = [
+    "season", "yr", "mnth", "hr", "holiday", "weekday", "workingday", "weathersit",
+    "casual", "registered", "cnt",
+]
+REQUIRED_COLUMNS = ["dteday"] + list(RANGE_RULES)
+
+
+@dataclass
+class QualityReport:
+    rows: int = 0
+    missing_columns: list = field(default_factory=list)
+    issues: dict = field(default_factory=dict)
+    inconsistent_cnt: int = 0
+    duplicate_keys: int = 0
+    missing_hours: int = 0
+    incomplete_days: int = 0
+    quarantined: int = 0
+
+    @property
+    def ok(self):
+        return not self.missing_columns and self.quarantined == 0
+
+    def to_frame(self):
+        rows = [("Kolom hilang", len(self.missing_columns))]
+        rows += [(f"Di luar rentang/tidak valid: {col}", n) for col, n in self.issues.items() if n]
+        rows += [
+            ("cnt ≠ casual + registered", self.inconsistent_cnt),
+            ("Duplikat (stasiun, dteday, hr)", self.duplicate_keys),
+            ("Jam hilang (kalender)", self.missing_hours),
+            ("Hari tidak lengkap", self.incomplete_days),
+            ("Baris dikarantina", self.quarantined),
+        ]
+        return pd.DataFrame(rows, columns=["Pemeriksaan", "Jumlah"])
+
+    def to_record(self):
+        # Satu baris JSON, supaya laporan bisa disimpan bersama data di cache disk
+        return pd.DataFrame({"report": [json.dumps(asdict(self))]})
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(**json.loads(record["report"].iloc[0]))
+
+
+def encode_keys(station_codes, day_numbers, hours, day_min, n_days):
+    # Kunci integer padat: ((stasiun * jumlah_hari) + hari) * 24 + jam
+    return (station_codes * n_days + (day_numbers - day_min)) * 24 + hours
+
+
+def validate_frame(frame, station_col="station"):
+    """Jalankan pemeriksaan skema, rentang, keunikan dan kelengkapan kalender sekaligus.
+
+    Mengembalikan (data_bersih, karantina, laporan). Baris duplikat pertama tetap
+    disimpan; duplikat berikutnya dan baris tidak valid masuk karantina.
+    """
+    report = QualityReport(rows=len(frame))
+    report.missing_columns = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if report.missing_columns:
+        return frame, frame.iloc[:0], report
+
+    n = len(frame)
+    bad = np.zeros(n, dtype=bool)
+
+    days = pd.to_datetime(frame["dteday"], errors="coerce").to_numpy().astype("datetime64[D]")
+    bad_day = np.isnat(days)
+    report.issues["dteday"] = int(bad_day.sum())
+    bad |= bad_day
+
+    values = {}
+    for col, (lo, hi) in RANGE_RULES.items():
+        x = pd.to_numeric(frame[col], errors="coerce").to_numpy(dtype=float)
+        invalid = np.isnan(x) | (x < lo)
+        if hi is not None:
+            invalid |= x > hi
+        if col in INTEGER_COLUMNS:
+            invalid |= x != np.floor(x)
+        report.issues[col] = int(invalid.sum())
+        bad |= invalid
+        values[col] = x
+
+    mismatch = values["cnt"] != values["casual"] + values["registered"]
+    report.inconsistent_cnt = int((mismatch & ~bad).sum())
+    bad |= mismatch
+
+    # Keunikan & kelengkapan kalender memakai kunci integer (tanpa hashing baris)
+    good = ~bad
+    day_num = days.astype(np.int64)
+    if station_col in frame.columns:
+        station_codes, _ = pd.factorize(frame[station_col])
+    else:
+        station_codes = np.zeros(n, dtype=np.int64)
+
+    if good.any():
+        g_station = station_codes[good]
+        g_day = day_num[good]
+        day_min, day_max = g_day.min(), g_day.max()
+        n_days = int(day_max - day_min + 1)
+        keys = encode_keys(g_station, g_day, values["hr"][good].astype(np.int64), day_min, n_days)
+
+        size = int(station_codes.max() + 1) * n_days * 24
+        first = np.full(size, n, dtype=np.int64)
+        np.minimum.at(first, keys, np.arange(len(keys)))
+        dup = first[keys] != np.arange(len(keys))
+        report.duplicate_keys = int(dup.sum())
+        bad[np.flatnonzero(good)[dup]] = True
+
+        # Jam yang seharusnya ada: rentang tanggal masing-masing stasiun × 24 jam
+        present = (first < n).reshape(-1, n_days, 24)
+        s_min = np.full(present.shape[0], n_days)
+        s_max = np.full(present.shape[0], -1)
+        np.minimum.at(s_min, g_station, g_day - day_min)
+        np.maximum.at(s_max, g_station, g_day - day_min)
+        in_span = (np.arange(n_days) >= s_min[:, None]) & (np.arange(n_days) <= s_max[:, None])
+        hours_per_day = present.sum(axis=2)
+        missing = np.where(in_span, 24 - hours_per_day, 0)
+        report.missing_hours = int(missing.sum())
+        report.incomplete_days = int((missing > 0).sum())
+
+    report.quarantined = int(bad.sum())
+    if not report.quarantined:
+        return frame, frame.iloc[:0], report
+    return frame[~bad], frame[bad], report